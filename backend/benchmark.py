@@ -0,0 +1,139 @@
+"""
+Filename: benchmark.py
+Benchmark runner over synthetic clubs (see synthetic.py). For every size
+tier and seed it solves one club with generate_schedule and records, from
+the solve's telemetry: model build time, time to the first solution, time
+until the gap between objective and bound is within --gap, extraction time
+and the total, next to the model size and the outcome. Results are written
+as JSON; with --baseline a previous results file is compared tier by tier.
+
+    python benchmark.py --tiers 10 50 100 --time-limit 60 --output bench.json
+    python benchmark.py --output new.json --baseline bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import ortools
+from main import GenerateScheduleRequest, generate_schedule
+from search import SolverSettings
+from synthetic import generate_club
+from telemetry import SolveTelemetry
+
+DEFAULT_TIERS = [10, 25, 50, 100, 250, 500]
+
+# timings compared against a baseline, all in seconds
+TIMINGS = ["build_time", "first_solution", "time_to_gap", "extraction", "wall_time"]
+
+def _time_to_gap(solutions: List[Dict[str, float]], gap: float) -> Optional[float]:
+    """First time an improving solution was within `gap` (relative) of its bound."""
+    for sol in solutions:
+        if abs(sol["objective"] - sol["bound"]) <= gap * max(1.0, abs(sol["objective"])):
+            return sol["time"]
+    return None
+
+def run_case(
+    num_teams: int,
+    seed: int,
+    settings: SolverSettings,
+    gap: float,
+    num_search_workers: int,
+    engine: str = "exact"
+) -> Dict:
+    fields, constraints = generate_club(num_teams, seed=seed)
+    request = GenerateScheduleRequest(
+        fields=fields, constraints=constraints,
+        weekday_objective=True, start_time_objective=True,
+        solver_settings=settings, engine=engine
+    )
+    telemetry = SolveTelemetry()
+    started = time.monotonic()
+    result = generate_schedule(request, num_search_workers=num_search_workers, telemetry=telemetry)
+    wall_time = time.monotonic() - started
+    data = telemetry.to_dict()
+    solutions = data["solutions"]
+    # decomposed requests have no model of their own, sum up the components
+    parts = data.get("components") or [data]
+    model = {key: sum(p["model"].get(key, 0) for p in parts) for key in ("sessions", "placements", "variables", "constraints")}
+    return {
+        "teams": num_teams,
+        "seed": seed,
+        "fields": len(fields),
+        "model": model,
+        "components": len(data.get("components", [])),
+        "status": data["status"],
+        "solution_type": result["solution_type"] if result else None,
+        "objective": solutions[-1]["objective"] if solutions else None,
+        "bound": solutions[-1]["bound"] if solutions else None,
+        "violations": len(result["violations"]) if result else None,
+        "build_time": max(p["build_time"] or 0.0 for p in parts),
+        "first_solution": solutions[0]["time"] if solutions else None,
+        "time_to_gap": _time_to_gap(solutions, gap),
+        "extraction": sum(p["phases"].get("extraction", 0.0) for p in parts),
+        "wall_time": wall_time,
+        "phases": data["phases"],
+    }
+
+def compare(results: List[Dict], baseline: List[Dict]) -> List[str]:
+    """One line per case found in both runs, with the ratio new/baseline of each timing."""
+    previous = {(r["teams"], r["seed"]): r for r in baseline}
+    lines = []
+    for r in results:
+        old = previous.get((r["teams"], r["seed"]))
+        if old is None:
+            continue
+        ratios = []
+        for key in TIMINGS:
+            if r[key] is None or old[key] is None:
+                ratios.append(f"{key} {r[key]} (was {old[key]})")
+            else:
+                ratios.append(f"{key} x{r[key] / max(old[key], 1e-6):.2f}")
+        lines.append(f"{r['teams']} teams, seed {r['seed']}: objective {r['objective']} (was {old['objective']}), " + ", ".join(ratios))
+    return lines
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generate_schedule on synthetic clubs.")
+    parser.add_argument("--tiers", type=int, nargs="+", default=DEFAULT_TIERS, help="club sizes in teams")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1])
+    parser.add_argument("--preset", choices=["preview", "balanced", "final"], default="balanced")
+    parser.add_argument("--time-limit", type=float, help="seconds per solve, overrides the preset")
+    parser.add_argument("--gap", type=float, default=0.05, help="relative gap for time_to_gap")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--engine", choices=["exact", "two_stage"], default="exact")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    settings = SolverSettings(preset=args.preset, time_limit=args.time_limit)
+    results = []
+    for num_teams in args.tiers:
+        for seed in args.seeds:
+            case = run_case(num_teams, seed, settings, args.gap, args.workers, args.engine)
+            results.append(case)
+            print(
+                f"{num_teams} teams, seed {seed}: {case['status']}, objective {case['objective']}, "
+                f"build {case['build_time']:.2f}s, first solution {case['first_solution']}, "
+                f"gap {args.gap} at {case['time_to_gap']}, total {case['wall_time']:.2f}s",
+                file=sys.stderr
+            )
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "ortools": ortools.__version__,
+            "settings": {**settings.model_dump(), "gap": args.gap, "workers": args.workers, "engine": args.engine},
+            "results": results,
+        }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            for line in compare(results, json.load(f)["results"]):
+                print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Filename: cache.py
+Content-addressed cache of finished schedule results. Requests are keyed by
+a canonical hash of their content, so a resubmitted request (page reload,
+re-opened plan) gets the stored solution instead of a new solve. The
+cache lives in memory and is not shared between worker processes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Keys that identify a record but do not change the schedule it produces
+IGNORED_KEYS = {"uid"}
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items() if k not in IGNORED_KEYS}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    return value
+
+def request_cache_key(request_data: Dict[str, Any]) -> str:
+    """SHA-256 of a JSON-mode request dump with sorted keys and ignored keys removed."""
+    canonical = json.dumps(_canonical(request_data), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class ResultCache:
+    """LRU cache with a TTL, holding {"solution": [...], "solution_type": str, "violations": [...]} per key."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def create_result_cache() -> ResultCache:
+    """
+    Build the result cache configured through the environment:
+        RESULT_CACHE_MAX_ENTRIES  default 256, 0 disables caching
+        RESULT_CACHE_TTL_SECONDS  default 1 h
+    """
+    return ResultCache(
+        max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 256)),
+        ttl_seconds=float(os.environ.get("RESULT_CACHE_TTL_SECONDS", 3600))
+    )
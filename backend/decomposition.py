@@ -0,0 +1,70 @@
+"""
+Filename: decomposition.py
+Splits a scheduling request into independent sub-problems. Sessions are
+linked to their team and to every top field they could be placed on; teams
+and top fields that end up connected form one component. Components share
+no variables and no objective terms, so each can be solved on its own.
+"""
+
+from typing import Dict, List, Tuple
+from models.field import Field
+from models.constraint import Constraint
+from field_tree import FieldTree, get_field_tree
+
+def _candidate_top_fields(c: Constraint, tree: FieldTree) -> List[int]:
+    """
+    Top fields on which a session for constraint `c` could get a variable in
+    generate_schedule. A pinned field's top field is always included, even
+    if the session cannot use it, so its component request keeps the field.
+    """
+    if c.field_id is not None:
+        if c.field_id not in tree.top_of:
+            raise ValueError(f"Unknown required_field {c.field_id}")
+        return [tree.top_of[c.field_id]]
+    cost = int(c.required_cost) if c.required_cost else 1000
+    result = []
+    for top_id in (f.field_id for f in tree.top_fields):
+        if cost not in tree.top_info[top_id]['allowed_demands']:
+            continue
+        windows = tree.window[tree.top_index[top_id]]
+        if c.day_of_week is not None:
+            windows = windows[c.day_of_week:c.day_of_week + 1]
+        if (windows[:, 1] - windows[:, 0] >= c.length).any():
+            result.append(top_id)
+    return result
+
+def find_components(fields: List[Field], constraints: List[Constraint]) -> List[Tuple[List[int], List[int]]]:
+    """
+    Return the independent components of a request as
+    (constraint indices, top field ids), ordered by their first constraint.
+    Top fields no session can use are left out.
+    """
+    tree = get_field_tree(fields)
+    parent: Dict[Tuple[str, int], Tuple[str, int]] = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[rb] = ra
+
+    for c in constraints:
+        team_node = ("team", c.team_id)
+        find(team_node)
+        for top_id in _candidate_top_fields(c, tree):
+            union(team_node, ("field", top_id))
+
+    groups: Dict[Tuple[str, int], Tuple[List[int], List[int]]] = {}
+    for idx, c in enumerate(constraints):
+        groups.setdefault(find(("team", c.team_id)), ([], []))[0].append(idx)
+    for f in tree.top_fields:
+        node = ("field", f.field_id)
+        if node in parent and find(node) in groups:
+            groups[find(node)][1].append(f.field_id)
+    return list(groups.values())
@@ -0,0 +1,299 @@
+"""
+Filename: executor.py
+Runs CP-SAT solves in a bounded process pool, outside the web server's
+threadpool. Jobs wait in a FIFO queue until a solve slot is free; when the
+queue is full new submissions are rejected so the API can answer 429.
+"""
+
+import multiprocessing
+import os
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# Server-side sizing, overridable through the environment
+MAX_CONCURRENT_SOLVES = int(os.environ.get("SOLVER_MAX_CONCURRENT_SOLVES", max(1, (os.cpu_count() or 1) // 8)))
+WORKERS_PER_SOLVE = int(os.environ.get("SOLVER_WORKERS_PER_SOLVE", 8))
+MAX_QUEUE_SIZE = int(os.environ.get("SOLVER_MAX_QUEUE_SIZE", 16))
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the solver queue is full."""
+
+STOP_POLL_INTERVAL = 0.25  # seconds between checks for stop requests (pool processes and should_stop)
+
+# Set in each pool process by _init_worker: the event queue carries events back
+# to the parent, the shared stop-request dict carries stop requests to workers
+_event_queue = None
+_stop_requests = None
+
+def _init_worker(event_queue, stop_requests) -> None:
+    global _event_queue, _stop_requests
+    from telemetry import configure_logging
+
+    _event_queue = event_queue
+    _stop_requests = stop_requests
+    configure_logging()
+
+def _watch_stop_requests(job_id: str, stop_event: threading.Event, job_done: threading.Event) -> None:
+    while not job_done.wait(STOP_POLL_INTERVAL):
+        if job_id in _stop_requests:
+            stop_event.set()
+            return
+
+def _solve_job(job_id: str, request_data: Dict[str, Any], num_search_workers: int) -> Optional[Dict]:
+    """Entry point executed inside a pool process."""
+    from main import generate_schedule, GenerateScheduleRequest
+    from telemetry import SolveTelemetry, dump_telemetry
+
+    _event_queue.put(("running", job_id, None))
+
+    def partial_callback(solution: List[Dict], progress: Dict[str, float]) -> None:
+        _event_queue.put(("partial", job_id, (solution, progress)))
+
+    stop_event = threading.Event()
+    job_done = threading.Event()
+    telemetry = SolveTelemetry()
+    threading.Thread(target=_watch_stop_requests, args=(job_id, stop_event, job_done), daemon=True).start()
+    try:
+        request = GenerateScheduleRequest.model_validate(request_data)
+        return generate_schedule(
+            request,
+            solution_callback=partial_callback,
+            num_search_workers=num_search_workers,
+            stop_event=stop_event,
+            telemetry=telemetry
+        )
+    finally:
+        job_done.set()
+        _event_queue.put(("telemetry", job_id, telemetry.to_dict()))
+        dump_telemetry(job_id, telemetry.to_dict())
+
+class SolverExecutor:
+    """
+    Bounded solver pool with a FIFO wait queue.
+
+    Job life-cycle notifications are delivered through the callbacks given to
+    the constructor, from executor threads:
+        on_start(job_id)
+        on_partial(job_id, solution, progress)
+        on_finish(job_id, result, error)   # result is None if nothing was found
+        on_telemetry(job_id, telemetry)    # optional, see telemetry.SolveTelemetry
+
+    With should_stop(job_id), the executor asks every STOP_POLL_INTERVAL
+    whether one of its queued or running jobs should end (e.g. a stop sent
+    to another worker process through a shared job store) and stops it
+    itself. A queued job stopped that way finishes with on_finish(job_id,
+    None, None).
+    """
+
+    def __init__(
+        self,
+        on_start: Callable[[str], None],
+        on_partial: Callable[[str, List[Dict], Dict[str, float]], None],
+        on_finish: Callable[[str, Optional[Dict], Optional[str]], None],
+        on_telemetry: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        should_stop: Optional[Callable[[str], bool]] = None,
+        max_concurrent_solves: int = MAX_CONCURRENT_SOLVES,
+        workers_per_solve: int = WORKERS_PER_SOLVE,
+        max_queue_size: int = MAX_QUEUE_SIZE
+    ):
+        self.on_start = on_start
+        self.on_partial = on_partial
+        self.on_finish = on_finish
+        self.on_telemetry = on_telemetry
+        self.should_stop = should_stop
+        self.max_concurrent_solves = max_concurrent_solves
+        self.workers_per_solve = workers_per_solve
+        self.max_queue_size = max_queue_size
+
+        self._pending: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._running: Set[str] = set()
+        self._cond = threading.Condition()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._event_queue = None
+        self._manager = None
+        self._stop_requests = None
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+    def _ensure_started(self) -> None:
+        # called with self._cond held
+        if self._pool is not None:
+            return
+        ctx = multiprocessing.get_context("spawn")
+        self._event_queue = ctx.Queue()
+        self._manager = ctx.Manager()
+        self._stop_requests = self._manager.dict()
+        self._pool = self._new_pool()
+        self._threads = [
+            threading.Thread(target=self._dispatch_loop, name="solver-dispatch", daemon=True),
+            threading.Thread(target=self._event_loop, name="solver-events", daemon=True),
+        ]
+        if self.should_stop is not None:
+            self._threads.append(threading.Thread(target=self._stop_poll_loop, name="solver-stop-poll", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_concurrent_solves,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._event_queue, self._stop_requests)
+        )
+
+    def _submit_to_pool(self, job_id: str, request_data: Dict[str, Any]) -> Future:
+        # called with self._cond held
+        try:
+            return self._pool.submit(_solve_job, job_id, request_data, self.workers_per_solve)
+        except BrokenProcessPool:
+            # a pool process died (its job already failed); start over with a fresh pool
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            return self._pool.submit(_solve_job, job_id, request_data, self.workers_per_solve)
+
+    def submit(self, job_id: str, request_data: Dict[str, Any]) -> int:
+        """
+        Queue a job and return its 1-based queue position.
+        Raises QueueFullError when max_queue_size jobs are already waiting.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Solver executor is shut down")
+            if len(self._pending) >= self.max_queue_size:
+                raise QueueFullError(f"Solver queue is full ({self.max_queue_size} jobs waiting)")
+            self._ensure_started()
+            self._pending.append((job_id, request_data))
+            self._cond.notify_all()
+            return len(self._pending)
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position of a waiting job, or None if it is not queued."""
+        with self._cond:
+            for pos, (queued_id, _) in enumerate(self._pending, start=1):
+                if queued_id == job_id:
+                    return pos
+        return None
+
+    def active_jobs(self) -> int:
+        """Number of jobs queued or running."""
+        with self._cond:
+            return len(self._pending) + len(self._running)
+
+    def queue_space(self) -> int:
+        """Number of jobs that can still be queued before submit raises QueueFullError."""
+        with self._cond:
+            return max(0, self.max_queue_size - len(self._pending))
+
+    def request_stop(self, job_id: str) -> Optional[str]:
+        """
+        Ask a job to end its search early.
+        Returns "dequeued" if the job was still waiting (it is removed from the
+        queue and will never run), "signalled" if a running solve was told to
+        stop, and None if the executor does not know the job.
+        """
+        with self._cond:
+            for entry in self._pending:
+                if entry[0] == job_id:
+                    self._pending.remove(entry)
+                    return "dequeued"
+            if job_id in self._running:
+                self._stop_requests[job_id] = True
+                return "signalled"
+        return None
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            for job_id in self._running:
+                self._stop_requests[job_id] = True
+            self._cond.notify_all()
+            pool, event_queue = self._pool, self._event_queue
+        if pool is not None:
+            # running solves were asked to stop, so this returns promptly
+            pool.shutdown(wait=True, cancel_futures=True)
+            event_queue.put(None)
+            self._manager.shutdown()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (
+                    not self._pending or len(self._running) >= self.max_concurrent_solves
+                ):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job_id, request_data = self._pending.popleft()
+                self._running.add(job_id)
+                try:
+                    future = self._submit_to_pool(job_id, request_data)
+                except Exception as exc:
+                    # the dispatch thread must survive, or every queued job waits forever
+                    traceback.print_exc()
+                    self._running.discard(job_id)
+                    future, error = None, f"Could not start the solver: {exc}"
+            if future is None:
+                self.on_finish(job_id, None, error)
+                continue
+            future.add_done_callback(lambda f, job_id=job_id: self._job_done(job_id, f))
+
+    def _job_done(self, job_id: str, future: Future) -> None:
+        with self._cond:
+            self._running.discard(job_id)
+            if not self._closed:
+                self._stop_requests.pop(job_id, None)
+            self._cond.notify_all()
+        if future.cancelled():
+            self.on_finish(job_id, None, "Solver executor shut down")
+            return
+        exc = future.exception()
+        if exc is not None:
+            self.on_finish(job_id, None, str(exc))
+        else:
+            self.on_finish(job_id, future.result(), None)
+
+    def _stop_poll_loop(self) -> None:
+        signalled: Set[str] = set()
+        while True:
+            with self._cond:
+                if self._cond.wait_for(lambda: self._closed, STOP_POLL_INTERVAL):
+                    return
+                job_ids = [job_id for job_id, _ in self._pending] + list(self._running)
+            signalled &= set(job_ids)
+            for job_id in job_ids:
+                if job_id in signalled:
+                    continue
+                try:
+                    stop = self.should_stop(job_id)
+                except Exception:
+                    traceback.print_exc()
+                    continue
+                if not stop:
+                    continue
+                outcome = self.request_stop(job_id)
+                if outcome == "dequeued":
+                    self.on_finish(job_id, None, None)
+                elif outcome == "signalled":
+                    signalled.add(job_id)
+
+    def _event_loop(self) -> None:
+        while True:
+            event = self._event_queue.get()
+            if event is None:
+                return
+            kind, job_id, payload = event
+            try:
+                if kind == "running":
+                    self.on_start(job_id)
+                elif kind == "partial":
+                    self.on_partial(job_id, *payload)
+                elif kind == "telemetry" and self.on_telemetry:
+                    self.on_telemetry(job_id, payload)
+            except Exception:
+                # a failing handler must not stop event delivery for other jobs
+                traceback.print_exc()
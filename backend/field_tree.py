@@ -0,0 +1,137 @@
+"""
+Filename: field_tree.py
+Precompiled index of a club's field tree. Built once from the fields of a
+request (and cached by the fields' content across requests), it answers
+the questions the solver, greedy scheduler, decomposition and validation
+keep asking in O(1) instead of walking parent chains:
+
+    top_id[i], cost[i], depth[i]   per field, i = index[field_id]
+    ancestor_bits[i]               bitset over field indices
+    top_of, cost_of, ancestors     the same by field id
+    window[t, day] = (start, end)  availability blocks of top field t, (0, 0) if closed
+
+The index is read-only; arrays are not writeable and mappings are proxies.
+"""
+
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Tuple
+import numpy as np
+from models.field import Field
+from utils import SIZE_TO_CAPACITY, build_fields_by_id, get_capacity_and_allowed, time_str_to_block
+
+# day numbering used throughout the solver (problem.py re-exports it)
+IDX_TO_DAY = {0: 'Mon', 1: 'Tue', 2: 'Wed', 3: 'Thu', 4: 'Fri', 5: 'Sat', 6: 'Sun'}
+DAY_TO_IDX = {day: d for d, day in IDX_TO_DAY.items()}
+FIELD_TREE_CACHE_SIZE = 64
+
+_FIELD_TYPE_SHARE = {'full': 1, 'half': 2, 'quarter': 4}
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+class FieldTree:
+
+    def __init__(self, fields: List[Field]):
+        fields_by_id, top_fields = build_fields_by_id(fields)
+        self.fields_by_id: Mapping[int, Field] = MappingProxyType(fields_by_id)
+        self.top_fields: Tuple[Field, ...] = tuple(top_fields)
+        # field ids in build_fields_by_id order (every field before its subfields)
+        self.ids: Tuple[int, ...] = tuple(fields_by_id)
+        self.index: Mapping[int, int] = MappingProxyType({fid: i for i, fid in enumerate(self.ids)})
+
+        # resolve every field's parent chain once, reusing resolved parents
+        n = len(self.ids)
+        top_id = np.empty(n, dtype=np.int64)
+        depth = np.empty(n, dtype=np.int64)
+        ancestor_bits = [0] * n
+        ancestors: List[FrozenSet[int]] = [frozenset()] * n
+        resolved = [False] * n
+        for i in range(n):
+            chain = []
+            j = i
+            while not resolved[j]:
+                chain.append(j)
+                parent_id = fields_by_id[self.ids[j]].parent_field_id
+                if parent_id is None:
+                    break
+                if parent_id not in self.index:
+                    raise ValueError(f"Field {self.ids[j]} has unknown parent field {parent_id}")
+                j = self.index[parent_id]
+                if j in chain:
+                    raise ValueError(f"Field {self.ids[j]} is its own ancestor")
+            for k in reversed(chain):
+                parent_id = fields_by_id[self.ids[k]].parent_field_id
+                if parent_id is None:
+                    top_id[k], depth[k] = self.ids[k], 0
+                else:
+                    p = self.index[parent_id]
+                    top_id[k], depth[k] = top_id[p], depth[p] + 1
+                    ancestor_bits[k] = ancestor_bits[p] | (1 << p)
+                    ancestors[k] = ancestors[p] | {parent_id}
+                resolved[k] = True
+
+        cost = np.empty(n, dtype=np.int64)
+        for i, fid in enumerate(self.ids):
+            top_capacity = SIZE_TO_CAPACITY[fields_by_id[int(top_id[i])].size]
+            cost[i] = top_capacity // _FIELD_TYPE_SHARE.get(fields_by_id[fid].field_type, 1)
+
+        self.top_id = _readonly(top_id)
+        self.depth = _readonly(depth)
+        self.cost = _readonly(cost)
+        self.ancestor_bits: Tuple[int, ...] = tuple(ancestor_bits)
+        self.top_of: Mapping[int, int] = MappingProxyType(dict(zip(self.ids, top_id.tolist())))
+        self.cost_of: Mapping[int, int] = MappingProxyType(dict(zip(self.ids, cost.tolist())))
+        self.ancestors: Mapping[int, FrozenSet[int]] = MappingProxyType(dict(zip(self.ids, ancestors)))
+        resources_by_top: Dict[int, List[int]] = {f.field_id: [] for f in top_fields}
+        for fid, tid in self.top_of.items():
+            resources_by_top.setdefault(tid, []).append(fid)
+        self.resources_by_top: Mapping[int, Tuple[int, ...]] = MappingProxyType(
+            {tid: tuple(res_ids) for tid, res_ids in resources_by_top.items()}
+        )
+
+        # per top field: capacity, allowed demand types, splits and day windows
+        self.top_index: Mapping[int, int] = MappingProxyType({f.field_id: t for t, f in enumerate(top_fields)})
+        window = np.zeros((len(top_fields), 7, 2), dtype=np.int64)
+        top_info = {}
+        for t, f in enumerate(top_fields):
+            total_cap, allowed_demands, max_splits = get_capacity_and_allowed(f)
+            day_windows = {}
+            for day_enum, avail in f.availability.items():
+                if day_enum.value in DAY_TO_IDX:
+                    d = DAY_TO_IDX[day_enum.value]
+                    day_windows[d] = (time_str_to_block(avail.start_time), time_str_to_block(avail.end_time))
+                    window[t, d] = day_windows[d]
+            top_info[f.field_id] = MappingProxyType({
+                'total_cap': total_cap,
+                'allowed_demands': tuple(allowed_demands),
+                'max_splits': max_splits,
+                'day_windows': MappingProxyType(day_windows),
+            })
+        self.window = _readonly(window)
+        self.top_info: Mapping[int, Mapping] = MappingProxyType(top_info)
+
+    def related(self, a: int, b: int) -> bool:
+        """Whether two fields are the same or one contains the other."""
+        i, j = self.index[a], self.index[b]
+        return i == j or bool(self.ancestor_bits[i] >> j & 1) or bool(self.ancestor_bits[j] >> i & 1)
+
+_cache: "OrderedDict[Tuple[str, ...], FieldTree]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_field_tree(fields: List[Field]) -> FieldTree:
+    """The FieldTree of `fields`, shared by every request with the same fields (LRU cache)."""
+    key = tuple(f.model_dump_json() for f in fields)
+    with _cache_lock:
+        tree = _cache.get(key)
+        if tree is not None:
+            _cache.move_to_end(key)
+            return tree
+    tree = FieldTree(fields)
+    with _cache_lock:
+        _cache[key] = tree
+        if len(_cache) > FIELD_TREE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tree
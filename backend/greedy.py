@@ -0,0 +1,82 @@
+"""
+Filename: greedy.py
+Greedy first-fit scheduler. Places the hardest sessions first onto the
+earliest free slot of a day the team does not train yet, following the same
+rules as the CP-SAT model. It runs in milliseconds and gives an instant
+preview schedule as well as a warm start for the exact solver.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+import numpy as np
+from occupancy import BLOCKS_PER_DAY, OccupancyGrid
+from problem import SchedulingProblem
+from registry import PlacementKey
+
+def greedy_placements(problem: SchedulingProblem) -> Tuple[Dict[int, Tuple[PlacementKey, int]], List[int]]:
+    """
+    Place sessions one by one, fewest start options first (ties: longer,
+    then larger sessions first). Each goes to the earliest start where its
+    resource and all related resources are free and the top field has
+    capacity left, on a day the team has no session yet, preferring days not
+    next to the team's other days. All candidates of a session are checked
+    at once on the occupancy grid.
+
+    Returns ({session: (key, start_block)}, unplaced sessions), the same
+    placement format hints.add_solution_hints takes.
+    """
+    grid = OccupancyGrid(problem)
+
+    # candidates per session as columns: res index, day, window start, window end
+    candidates: Dict[int, np.ndarray] = {}
+    options: Dict[int, int] = {}
+    for s, (_, _, _, _, length, _, _, _) in enumerate(problem.sessions):
+        rows = [(grid.res_index[r], d, ws, we) for _, r, d, ws, we in problem.candidates(s)]
+        cand = np.array(rows, dtype=np.int64).reshape(-1, 4)
+        options[s] = int((cand[:, 3] - cand[:, 2] - length + 1).sum())
+        candidates[s] = cand
+
+    order = sorted(
+        options,
+        key=lambda s: (options[s], -problem.sessions[s][4], -problem.sessions[s][3], s)
+    )
+    team_days: Dict[int, Set[int]] = defaultdict(set)
+    placements: Dict[int, Tuple[PlacementKey, int]] = {}
+    unplaced: List[int] = []
+    for s in order:
+        _, team_id, _, _, length, _, _, _ = problem.sessions[s]
+        cand = candidates[s]
+        if length <= 0:
+            # nothing to book; the solver places such sessions itself
+            unplaced.append(s)
+            continue
+        days = np.array(sorted(team_days[team_id]), dtype=np.int64)
+        cand = cand[~np.isin(cand[:, 1], days)]
+        if not len(cand):
+            unplaced.append(s)
+            continue
+        ri, d = cand[:, 0], cand[:, 1]
+
+        free = grid.free_blocks(ri, d)
+        # fits[k, t]: `length` free blocks in a row starting at t
+        runs = np.zeros((len(cand), BLOCKS_PER_DAY + 1), dtype=np.int32)
+        np.cumsum(free, axis=1, out=runs[:, 1:])
+        fits = runs[:, length:] - runs[:, :-length] == length
+        # only starts inside the candidate's window (a single one for a fixed start)
+        starts = np.arange(fits.shape[1])
+        fits &= (starts >= cand[:, 2:3]) & (starts <= cand[:, 3:4] - length)
+        has_start = fits.any(axis=1)
+        if not has_start.any():
+            unplaced.append(s)
+            continue
+        first_start = fits.argmax(axis=1)
+        day_score = np.isin(d - 1, days).astype(np.int64) + np.isin(d + 1, days)
+
+        # fewest neighbouring team days, then earliest start, then candidate order
+        k = np.lexsort((np.arange(len(cand)), first_start, day_score, ~has_start))[0]
+        start = int(first_start[k])
+        res_id = grid.res_ids[ri[k]]
+        grid.book(res_id, int(d[k]), start, start + length)
+        team_days[team_id].add(int(d[k]))
+        placements[s] = ((s, res_id, int(d[k])), start)
+    return placements, unplaced
@@ -0,0 +1,173 @@
+"""
+Filename: hints.py
+Maps a previous schedule onto the placement variables of a new model so it
+can be used as a warm start (AddHint) or to lock sessions in place.
+"""
+
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from ortools.sat.python import cp_model
+from models.schedule import ScheduleEntry, ScheduledSession
+from field_tree import DAY_TO_IDX
+from registry import VariableRegistry, PlacementKey
+from search import solve_with_stop
+from utils import time_str_to_block
+
+HINT_COMPLETION_SECONDS = 5.0
+# completion is skipped on larger models, and gets at most this share of the time limit
+HINT_COMPLETION_MAX_PLACEMENTS = 20000
+HINT_COMPLETION_SHARE = 0.1
+
+# (session_id or None, team_id, field_id, day, start_block)
+PreviousPlacement = Tuple[Optional[int], int, int, int, int]
+
+def normalize_previous_schedule(
+    previous: Sequence[Union[ScheduleEntry, ScheduledSession]]
+) -> List[PreviousPlacement]:
+    """Bring ScheduleEntry items and solver session dicts to one placement format."""
+    placements = []
+    for item in previous:
+        if isinstance(item, ScheduleEntry):
+            if item.team_id is None or item.field_id is None:
+                continue
+            start_blk = item.dtstart.hour * 4 + item.dtstart.minute // 15
+            placements.append((None, item.team_id, item.field_id, item.dtstart.weekday(), start_blk))
+        else:
+            placements.append((
+                item.session_id, item.team_id, item.field_id,
+                DAY_TO_IDX[item.day_of_week], time_str_to_block(item.start_time)
+            ))
+    return placements
+
+def match_previous_placements(
+    model: cp_model.CpModel,
+    registry: VariableRegistry,
+    all_sessions: List[Tuple],
+    previous: List[PreviousPlacement]
+) -> Dict[int, Tuple[PlacementKey, int]]:
+    """
+    Assign previous placements to sessions of the new model.
+
+    A placement goes to a session of the same team that has a candidate
+    variable on that field and day whose start domain contains the previous
+    start. The session with the same session_id is preferred, otherwise the
+    team's sessions are tried in order. Returns {session: (key, start_block)}.
+    """
+    sessions_by_team: Dict[int, List[int]] = defaultdict(list)
+    for s, session_data in enumerate(all_sessions):
+        sessions_by_team[session_data[1]].append(s)
+
+    def start_fits(key: PlacementKey, start_blk: int) -> bool:
+        lo, hi = model.Proto().variables[registry.start[key].Index()].domain[:2]
+        return lo <= start_blk <= hi
+
+    matches: Dict[int, Tuple[PlacementKey, int]] = {}
+    for session_id, team_id, field_id, d, start_blk in previous:
+        team_sessions = sessions_by_team.get(team_id, [])
+        if session_id in team_sessions:
+            candidates = [session_id] + [s for s in team_sessions if s != session_id]
+        else:
+            candidates = team_sessions
+        for s in candidates:
+            key = (s, field_id, d)
+            if s not in matches and key in registry.presence and start_fits(key, start_blk):
+                matches[s] = (key, start_blk)
+                break
+    return matches
+
+def add_solution_hints(
+    model: cp_model.CpModel,
+    registry: VariableRegistry,
+    matches: Dict[int, Tuple[PlacementKey, int]]
+) -> None:
+    """Hint every matched session onto its previous placement."""
+    for s, (chosen_key, start_blk) in matches.items():
+        for key in registry.by_session[s]:
+            model.AddHint(registry.presence[key], key == chosen_key)
+        model.AddHint(registry.start[chosen_key], start_blk)
+
+def complete_hints(
+    model: cp_model.CpModel,
+    registry: VariableRegistry,
+    matches: Dict[int, Tuple[PlacementKey, int]],
+    time_limit: float = HINT_COMPLETION_SECONDS,
+    stop_event: Optional[threading.Event] = None
+) -> bool:
+    """
+    Turn the placement hints into a full solution hint. A copy of the model
+    with every matched session fixed is solved quickly; its solution, which
+    also covers the objective helper variables, replaces the hints on `model`.
+    Returns False (leaving the existing hints) if no completion is found
+    or stop_event gets set.
+    """
+    completion = model.Clone()
+    completion.ClearHints()
+    for chosen_key, start_blk in matches.values():
+        completion.Add(completion.GetIntVarFromProtoIndex(registry.presence[chosen_key].Index()) == 1)
+        completion.Add(completion.GetIntVarFromProtoIndex(registry.start[chosen_key].Index()) == start_blk)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = 1
+    # any feasible completion is a good hint, it does not need to be optimal
+    solver.parameters.stop_after_first_solution = True
+    if solve_with_stop(solver, completion, stop_event=stop_event) not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return False
+    model.ClearHints()
+    for idx, value in enumerate(solver.response_proto.solution):
+        model.AddHint(model.GetIntVarFromProtoIndex(idx), value)
+    return True
+
+def fix_sessions(
+    model: cp_model.CpModel,
+    registry: VariableRegistry,
+    matches: Dict[int, Tuple[PlacementKey, int]],
+    sessions: List[int]
+) -> None:
+    """Force the given matched sessions onto their previous placement."""
+    for s in sessions:
+        if s not in matches:
+            continue
+        chosen_key, start_blk = matches[s]
+        model.Add(registry.presence[chosen_key] == 1)
+        model.Add(registry.start[chosen_key] == start_blk)
+
+def select_unaffected_sessions(
+    all_sessions: List[Tuple],
+    previous: List[PreviousPlacement],
+    matches: Dict[int, Tuple[PlacementKey, int]],
+    top_of: Dict[int, int],
+    changed_team_ids: Iterable[int] = (),
+    changed_field_ids: Iterable[int] = ()
+) -> List[int]:
+    """
+    Sessions an incremental re-solve keeps in place.
+
+    The affected neighbourhood is every (top field, day) cell that held a
+    previous placement of a changed team, or a previous placement that no
+    longer matches a session (removed team, edited constraint, changed field
+    availability), plus every day of a changed field's top field. Matched
+    sessions outside that neighbourhood whose team did not change are returned;
+    everything else, including sessions without a previous placement, is free.
+    """
+    changed_teams = set(changed_team_ids)
+    changed_tops = {top_of[f] for f in changed_field_ids if f in top_of}
+
+    used = Counter(
+        (all_sessions[s][1], key[1], key[2], start_blk) for s, (key, start_blk) in matches.items()
+    )
+    freed_cells: Set[Tuple[int, int]] = set()
+    for _, team_id, field_id, d, start_blk in previous:
+        placement = (team_id, field_id, d, start_blk)
+        if used[placement] > 0 and team_id not in changed_teams:
+            used[placement] -= 1
+            continue
+        if field_id in top_of:
+            freed_cells.add((top_of[field_id], d))
+
+    return [
+        s for s, ((_, res_id, d), _) in matches.items()
+        if all_sessions[s][1] not in changed_teams
+        and top_of[res_id] not in changed_tops
+        and (top_of[res_id], d) not in freed_cells
+    ]
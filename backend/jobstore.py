@@ -0,0 +1,260 @@
+"""
+Filename: jobstore.py
+Storage for schedule generation jobs. A job is a JSON-serializable dict
+(status, result, error, timestamps, latest solution, ...).
+
+Both backends evict finished jobs after a TTL and, least recently used
+first, when the store holds more than max_jobs jobs or max_bytes of
+serialized job data. Pending and running jobs are never evicted.
+
+    MemoryJobStore  - per-process dict, the default
+    SQLiteJobStore  - file-backed, shared by all uvicorn workers on a host
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+JobRecord = Dict[str, Any]
+
+ACTIVE_STATUSES = ("pending", "running")
+# SQLiteJobStore.get refreshes a job's least-recently-used time at most this often
+ACCESS_TOUCH_SECONDS = 60.0
+
+def _record_size(record: JobRecord) -> int:
+    return len(json.dumps(record, default=str))
+
+class JobStore:
+    """Interface shared by the job store backends."""
+
+    def __init__(self, max_jobs: int = 1000, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 24 * 3600):
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    def create(self, job_id: str, record: JobRecord) -> None:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        raise NotImplementedError
+
+    def update(self, job_id: str, changes: JobRecord, only_if_status: Optional[Iterable[str]] = None) -> Optional[JobRecord]:
+        """
+        Apply `changes` to a job atomically and return the updated record.
+        If only_if_status is given, the job is only changed while its status
+        is one of those values. Returns None if the job is missing or the
+        status did not match.
+        """
+        raise NotImplementedError
+
+    def delete(self, job_id: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Number of stored jobs and their total serialized size in bytes."""
+        raise NotImplementedError
+
+class MemoryJobStore(JobStore):
+
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        # job_id -> (record, size, finished_at); ordered from least to most recently used
+        self._jobs: "OrderedDict[str, tuple]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _put(self, job_id: str, record: JobRecord) -> None:
+        old = self._jobs.pop(job_id, None)
+        if old is not None:
+            self._total_bytes -= old[1]
+        finished_at = old[2] if old is not None else None
+        if record["status"] not in ACTIVE_STATUSES and finished_at is None:
+            finished_at = time.monotonic()
+        size = _record_size(record)
+        self._jobs[job_id] = (record, size, finished_at)
+        self._total_bytes += size
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        expired = [job_id for job_id, (_, _, fin) in self._jobs.items()
+                   if fin is not None and now - fin > self.ttl_seconds]
+        for job_id in expired:
+            self._total_bytes -= self._jobs.pop(job_id)[1]
+        if len(self._jobs) <= self.max_jobs and self._total_bytes <= self.max_bytes:
+            return
+        for job_id in [j for j, (_, _, fin) in self._jobs.items() if fin is not None]:
+            if len(self._jobs) <= self.max_jobs and self._total_bytes <= self.max_bytes:
+                break
+            self._total_bytes -= self._jobs.pop(job_id)[1]
+
+    def create(self, job_id: str, record: JobRecord) -> None:
+        with self._lock:
+            self._put(job_id, dict(record))
+            self._evict()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            self._jobs.move_to_end(job_id)
+            return dict(entry[0])
+
+    def update(self, job_id: str, changes: JobRecord, only_if_status: Optional[Iterable[str]] = None) -> Optional[JobRecord]:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            if only_if_status is not None and entry[0]["status"] not in only_if_status:
+                return None
+            record = {**entry[0], **changes}
+            self._put(job_id, record)
+            self._evict()
+            return dict(record)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"jobs": len(self._jobs), "bytes": self._total_bytes}
+
+class SQLiteJobStore(JobStore):
+    """
+    Jobs kept in a SQLite file in WAL mode so several processes can share it.
+    Times are wall-clock (time.time()) since they are compared across processes.
+    """
+
+    def __init__(self, path: str, **limits):
+        super().__init__(**limits)
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    finished_at REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_accessed ON jobs (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _write(self, conn: sqlite3.Connection, job_id: str, record: JobRecord, finished_at: Optional[float]) -> None:
+        now = time.time()
+        if record["status"] not in ACTIVE_STATUSES and finished_at is None:
+            finished_at = now
+        data = json.dumps(record, default=str)
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, status, data, size, accessed_at, finished_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, record["status"], data, len(data), now, finished_at)
+        )
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (time.time() - self.ttl_seconds,)
+        )
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM jobs").fetchone()
+        if count <= self.max_jobs and total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT job_id, size FROM jobs WHERE finished_at IS NOT NULL ORDER BY accessed_at"
+        ).fetchall()
+        victims = []
+        for job_id, size in rows:
+            if count <= self.max_jobs and total <= self.max_bytes:
+                break
+            victims.append((job_id,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM jobs WHERE job_id = ?", victims)
+
+    def create(self, job_id: str, record: JobRecord) -> None:
+        with self._transaction() as conn:
+            self._write(conn, job_id, record, None)
+            self._evict(conn)
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        conn = self._conn()
+        row = conn.execute("SELECT data, accessed_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        # reads are frequent (status and stream polls), only touch the LRU time now and then
+        if now - row[1] > ACCESS_TOUCH_SECONDS:
+            conn.execute("UPDATE jobs SET accessed_at = ? WHERE job_id = ?", (now, job_id))
+        return json.loads(row[0])
+
+    def update(self, job_id: str, changes: JobRecord, only_if_status: Optional[Iterable[str]] = None) -> Optional[JobRecord]:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data, finished_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[0])
+            if only_if_status is not None and record["status"] not in only_if_status:
+                return None
+            record.update(changes)
+            self._write(conn, job_id, record, row[1])
+            self._evict(conn)
+            return record
+
+    def delete(self, job_id: str) -> None:
+        self._conn().execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def stats(self) -> Dict[str, int]:
+        count, total = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM jobs").fetchone()
+        return {"jobs": count, "bytes": total}
+
+def create_job_store() -> JobStore:
+    """
+    Build the job store configured through the environment:
+        JOB_STORE_BACKEND      "memory" (default) or "sqlite"
+        JOB_STORE_PATH         SQLite file, default "jobs.sqlite3"
+        JOB_STORE_MAX_JOBS     default 1000
+        JOB_STORE_MAX_BYTES    default 256 MiB
+        JOB_STORE_TTL_SECONDS  how long finished jobs are kept, default 24 h
+    """
+    limits = {
+        "max_jobs": int(os.environ.get("JOB_STORE_MAX_JOBS", 1000)),
+        "max_bytes": int(os.environ.get("JOB_STORE_MAX_BYTES", 256 * 1024 * 1024)),
+        "ttl_seconds": float(os.environ.get("JOB_STORE_TTL_SECONDS", 24 * 3600)),
+    }
+    backend = os.environ.get("JOB_STORE_BACKEND", "memory")
+    if backend == "sqlite":
+        return SQLiteJobStore(os.environ.get("JOB_STORE_PATH", "jobs.sqlite3"), **limits)
+    if backend == "memory":
+        return MemoryJobStore(**limits)
+    raise ValueError(f"Unknown JOB_STORE_BACKEND {backend!r}")
@@ -6,217 +6,377 @@ Provides a generate_schedule function to be called from other modules.
 
 from ortools.sat.python import cp_model
 from collections import defaultdict
-# import cProfile disabled
-# import pstats disabled
-from utils import ( time_str_to_block, blocks_to_time_str, get_capacity_and_allowed, build_fields_by_id, find_top_field_and_cost)
-from typing import List, Optional, Dict, Set
-from objectives import add_adjacency_objective, add_year_gap_objective
+from concurrent.futures import ThreadPoolExecutor
+import math
+import threading
+import time
+from utils import blocks_to_time_str
+from typing import List, Literal, Optional, Dict, Tuple, Union
+from objectives import add_adjacency_objective, add_year_gap_objective, build_year_presence_index
 from models.field import Field
 from models.constraint import Constraint
+from models.schedule import ScheduleEntry, ScheduledSession
 from pydantic import BaseModel
-from test import fieldConflicts, analyzeAdjacencyPatterns 
+from registry import VariableRegistry, SolutionDecoder
+from decomposition import find_components
+from field_tree import get_field_tree
+from problem import IDX_TO_DAY, SchedulingProblem, Session
+from greedy import greedy_placements
+from telemetry import SolveTelemetry
+from packing import pack_subfields, top_field_classes
+from symmetry import add_session_order, assign_resources, equivalent_resources, equivalent_sessions, order_matches
+from search import LnsSettings, SolverSettings, STOP_POLL_INTERVAL, run_lns, solve_with_stop
+from hints import (
+    HINT_COMPLETION_MAX_PLACEMENTS, HINT_COMPLETION_SECONDS, HINT_COMPLETION_SHARE,
+    normalize_previous_schedule, match_previous_placements, add_solution_hints,
+    complete_hints, fix_sessions, select_unaffected_sessions
+)
+from validation import find_conflicts
+
+class ScheduleEdit(BaseModel):
+    """What changed since previous_schedule, for an incremental re-solve."""
+    changed_team_ids: List[int] = []
+    changed_field_ids: List[int] = []
 
 class GenerateScheduleRequest(BaseModel):
     fields: List[Field]
     constraints: List[Constraint]
     weekday_objective: bool
     start_time_objective: bool
-
-def generate_schedule(request: GenerateScheduleRequest, solution_callback=None) -> Optional[Dict]:
-    # profiler = cProfile.Profile()
-    # profiler.enable()
-
-    # Build field objects and organize them
-    fields_by_id, top_fields = build_fields_by_id(request.fields)
-    # Build ancestor map: ancestor_map[field_id] = {set of its ancestor_ids}
-    ancestor_map: Dict[int, Set[int]] = defaultdict(set)
-    for fid_child, field_obj_child in fields_by_id.items():
-        current_parent_id = field_obj_child.parent_field_id
-        while current_parent_id is not None:
-            ancestor_map[fid_child].add(current_parent_id)
-            parent_obj = fields_by_id.get(current_parent_id)
-            if parent_obj:
-                current_parent_id = parent_obj.parent_field_id
-            else:
-                break
-
-    # Build subfield resources and capacities
-    resource_ids_by_top = defaultdict(list)
-    capacity_by_id = {}
-    for res_id, res_obj in fields_by_id.items():
-        top_id, cap = find_top_field_and_cost(res_id, fields_by_id)
-        capacity_by_id[res_id] = cap
-        resource_ids_by_top[top_id].append(res_id)
-    possible_days = list(range(7))
-    top_field_ids = list(resource_ids_by_top.keys())
-
-    # Process all constraints and convert them to session requirements
-    all_sessions = []
-    session_index = 0
-    for c in request.constraints:
-        if c.field_id is not None:
-            top_f_id, sub_cost = find_top_field_and_cost(c.field_id, fields_by_id)
-            final_cost = sub_cost
-            forced_top_field = top_f_id
-        else:
-            final_cost = int(c.required_cost) if c.required_cost else 1000
-            forced_top_field = None
-
-        all_sessions.append(
-            (
-                session_index,
-                c.team_id,
-                forced_top_field,
-                final_cost,
-                c.length,
-                c.field_id,
-                c.start_time,
-                c.day_of_week
-            )
+    # Optional warm start: a previous schedule, as ScheduleEntry items or solver session dicts
+    previous_schedule: Optional[List[Union[ScheduledSession, ScheduleEntry]]] = None
+    # Teams whose sessions are fixed to their place in previous_schedule
+    locked_team_ids: List[int] = []
+    # Incremental mode: keep previous_schedule except around what the edit touches
+    edit: Optional[ScheduleEdit] = None
+    # Time limit, workers, stopping rules; defaults from a server-side preset
+    solver_settings: SolverSettings = SolverSettings()
+    # Improve the schedule by Large Neighborhood Search instead of one long solve
+    lns: Optional[LnsSettings] = None
+    # "two_stage": place sessions on top fields under capacity only and pack
+    # them onto subfields afterwards (see packing.py)
+    engine: Literal["exact", "two_stage"] = "exact"
+    # cProfile the solve and return the report in the telemetry (always on with SOLVER_PROFILE=1);
+    # does not cover the component solves of a decomposed request (see SolveTelemetry.profiling)
+    profile: bool = False
+
+def _session_dict(session: Session, res_id: int, d: int, start_blk: int, end_blk: int) -> Dict:
+    """One placed session in the format generate_schedule returns."""
+    sid, team_id, _, req_capacity, _, req_field_id, _, _ = session
+    return {
+        "session_id": sid,
+        "team_id": team_id,
+        "day_of_week": IDX_TO_DAY.get(d, "UnknownDay"),
+        "start_time": blocks_to_time_str(start_blk),
+        "end_time": blocks_to_time_str(end_blk),
+        "field_id": res_id,
+        "required_cost": req_capacity,
+        "required_field": req_field_id,
+    }
+
+def generate_preview(request: GenerateScheduleRequest) -> Dict:
+    """
+    Instant schedule from the greedy first-fit heuristic (see greedy.py),
+    without running CP-SAT. Sessions the heuristic could not place are
+    listed by session id in "unplaced_session_ids".
+    """
+    problem = SchedulingProblem(request.fields, request.constraints)
+    placements, unplaced = greedy_placements(problem)
+    solution = []
+    for s in sorted(placements):
+        (_, res_id, d), start_blk = placements[s]
+        solution.append(_session_dict(problem.sessions[s], res_id, d, start_blk, start_blk + problem.sessions[s][4]))
+    return {
+        "solution": solution,
+        "solution_type": "PREVIEW",
+        "unplaced_session_ids": [problem.sessions[s][0] for s in sorted(unplaced)]
+    }
+
+def _component_request(
+    request: GenerateScheduleRequest,
+    constraint_idx: List[int],
+    top_ids: List[int],
+    top_of: Dict[int, int]
+) -> GenerateScheduleRequest:
+    """Restrict a request to one component (see decomposition.find_components)."""
+    local_of_global = {g: l for l, g in enumerate(constraint_idx)}
+    teams = {request.constraints[i].team_id for i in constraint_idx}
+    tops = set(top_ids)
+    previous = None
+    if request.previous_schedule:
+        previous = []
+        for item in request.previous_schedule:
+            if item.team_id not in teams and top_of.get(item.field_id) not in tops:
+                continue
+            if isinstance(item, ScheduledSession) and item.session_id is not None:
+                item = item.model_copy(update={"session_id": local_of_global.get(item.session_id)})
+            previous.append(item)
+    return request.model_copy(update={
+        "fields": [f for f in request.fields if f.field_id in tops],
+        "constraints": [request.constraints[i] for i in constraint_idx],
+        "previous_schedule": previous,
+    })
+
+def _split_workers(sizes: List[int], num_search_workers: int) -> List[int]:
+    """
+    Search workers per component, in proportion to its size, at least one
+    each. They add up to num_search_workers when there are no more
+    components than workers (largest remainder); otherwise every component
+    gets one, as only num_search_workers of them run at a time.
+    """
+    spare = num_search_workers - len(sizes)
+    if spare <= 0:
+        return [1] * len(sizes)
+    total = sum(sizes) or 1
+    shares = [spare * size / total for size in sizes]
+    workers = [1 + int(share) for share in shares]
+    by_remainder = sorted(range(len(sizes)), key=lambda i: int(shares[i]) - shares[i])
+    for i in by_remainder[:num_search_workers - sum(workers)]:
+        workers[i] += 1
+    return workers
+
+def _solve_components(
+    request: GenerateScheduleRequest,
+    components: List[Tuple[List[int], List[int]]],
+    solution_callback,
+    num_search_workers: int,
+    stop_event: Optional[threading.Event],
+    telemetry: SolveTelemetry
+) -> Optional[Dict]:
+    """
+    Solve independent components as separate models, in parallel, and merge
+    their solutions. Session ids in the merged solution refer to the full request.
+    All components share the request's time limit: each gets what is left of
+    it divided by the rounds of parallel solves still to come.
+    """
+    top_of = get_field_tree(request.fields).top_of
+    parallel = min(len(components), num_search_workers)
+    time_limit = request.solver_settings.resolve(num_search_workers).time_limit
+    started = time.monotonic()
+    num_started = 0
+    workers = _split_workers([len(constraint_idx) for constraint_idx, _ in components], num_search_workers)
+
+    # one stop signal for all components: set by the caller or when a component fails
+    component_stop = threading.Event()
+    all_done = threading.Event()
+    if stop_event is not None:
+        def forward_stop():
+            while not all_done.is_set():
+                if stop_event.wait(STOP_POLL_INTERVAL):
+                    component_stop.set()
+                    return
+        threading.Thread(target=forward_stop, daemon=True).start()
+
+    latest: Dict[int, Tuple[List[Dict], Dict[str, float]]] = {}
+    latest_lock = threading.Lock()
+
+    def to_global(solution: List[Dict], constraint_idx: List[int]) -> List[Dict]:
+        return [{**sess, "session_id": constraint_idx[sess["session_id"]]} for sess in solution]
+
+    component_telemetry = [telemetry.component() for _ in components]
+
+    def solve(i: int) -> Optional[Dict]:
+        nonlocal num_started
+        constraint_idx, top_ids = components[i]
+        with latest_lock:
+            rounds_left = math.ceil((len(components) - num_started) / parallel)
+            num_started += 1
+        remaining = max(0.0, time_limit - (time.monotonic() - started))
+        component_request = _component_request(request, constraint_idx, top_ids, top_of)
+        component_request = component_request.model_copy(update={
+            "solver_settings": request.solver_settings.model_copy(update={"time_limit": remaining / rounds_left})
+        })
+
+        def component_callback(solution: List[Dict], progress: Dict[str, float]) -> None:
+            with latest_lock:
+                latest[i] = (to_global(solution, constraint_idx), progress)
+                # report once every component has a solution
+                if len(latest) < len(components):
+                    return
+                merged = sorted(
+                    (sess for sol, _ in latest.values() for sess in sol),
+                    key=lambda sess: sess["session_id"]
+                )
+                progress = {
+                    "objective": sum(p["objective"] for _, p in latest.values()),
+                    "bound": sum(p["bound"] for _, p in latest.values()),
+                    "wall_time": max(p["wall_time"] for _, p in latest.values()),
+                }
+                telemetry.record_solution(progress)
+                if solution_callback:
+                    solution_callback(merged, progress)
+
+        result = _generate_schedule(
+            component_request,
+            solution_callback=component_callback,
+            num_search_workers=workers[i],
+            stop_event=component_stop,
+            decompose=False,
+            telemetry=component_telemetry[i]
         )
-        session_index += 1
-
+        component_telemetry[i].begin_phase(None)
+        if result is None:
+            # the whole request is infeasible, no need to finish the others
+            component_stop.set()
+            return None
+        return {**result, "solution": to_global(result["solution"], constraint_idx)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            results = list(pool.map(solve, range(len(components))))
+    finally:
+        all_done.set()
+
+    if any(r is None for r in results):
+        telemetry.record_result("INFEASIBLE")
+        return None
+    all_optimal = all(r["solution_type"] == "OPTIMAL" for r in results)
+    telemetry.record_result("OPTIMAL" if all_optimal else "FEASIBLE")
+    telemetry.begin_phase("validation")
+    solution = sorted((sess for r in results for sess in r["solution"]), key=lambda sess: sess["session_id"])
+    return {
+        "solution": solution,
+        "solution_type": "OPTIMAL" if all_optimal else "FEASIBLE (not optimal)",
+        "violations": [v.model_dump() for v in find_conflicts(solution, request.fields, request.constraints)]
+    }
+
+def generate_schedule(
+    request: GenerateScheduleRequest,
+    solution_callback=None,
+    num_search_workers: int = 8,
+    stop_event: Optional[threading.Event] = None,
+    decompose: bool = True,
+    telemetry: Optional[SolveTelemetry] = None
+) -> Optional[Dict]:
+    """
+    Build and solve the scheduling model. If stop_event is given and gets set
+    while solving, the search ends early and the best solution found so far
+    is returned (or None if there is none yet). With decompose, a request that
+    splits into independent groups of teams and top fields is solved as one
+    model per group. num_search_workers is the most workers the request's
+    solver_settings may use. Model size, phase timings and the solution
+    timeline are recorded into `telemetry` if given, and summarized in a
+    log line of the "telemetry" logger.
+    """
+    if telemetry is None:
+        telemetry = SolveTelemetry()
+    try:
+        with telemetry.profiling(request.profile):
+            return _generate_schedule(
+                request, solution_callback, num_search_workers, stop_event, decompose, telemetry
+            )
+    finally:
+        telemetry.log_summary()
+
+def _generate_schedule(
+    request: GenerateScheduleRequest,
+    solution_callback,
+    num_search_workers: int,
+    stop_event: Optional[threading.Event],
+    decompose: bool,
+    telemetry: SolveTelemetry
+) -> Optional[Dict]:
+    settings = request.solver_settings.resolve(num_search_workers)
+    num_search_workers = settings.num_workers
+    if stop_event is not None and stop_event.is_set():
+        telemetry.record_result("UNKNOWN")
+        return None
+    if decompose:
+        telemetry.begin_phase("decomposition")
+        components = find_components(request.fields, request.constraints)
+        if len(components) > 1:
+            return _solve_components(request, components, solution_callback, num_search_workers, stop_event, telemetry)
+
+    # Fields, resources, sessions and day windows of the request
+    telemetry.begin_phase("field_index")
+    problem = SchedulingProblem(request.fields, request.constraints)
+    ancestor_map = problem.ancestor_map
+    all_sessions = problem.sessions
     num_sessions = len(all_sessions)
+    field_info = problem.field_info
 
-    idx_to_day = {0: 'Mon', 1: 'Tue', 2: 'Wed', 3: 'Thu', 4: 'Fri', 5: 'Sat', 6: 'Sun'}
-
-    # Build field information including capacity, allowed demand types, and time windows
-    field_info = {}
-    for f in top_fields:
-        total_cap, allowed_demands, max_splits = get_capacity_and_allowed(f)
-        day_windows = {}
-        for day_enum, avail in f.availability.items():
-            start_block = time_str_to_block(avail.start_time)
-            end_block = time_str_to_block(avail.end_time)
-            try:
-                d_idx = list(idx_to_day.values()).index(day_enum.value)
-            except ValueError:
-                continue
-            day_windows[d_idx] = (start_block, end_block)
-
-        field_info[f.field_id] = {
-            'total_cap': total_cap,
-            'allowed_demands': allowed_demands,
-            'max_splits': max_splits,
-            'day_windows': day_windows
-        }
-
-    # Collect all possible start/end times across all fields
-    all_starts = []
-    all_ends = []
-    for f in top_fields:
-        if f.field_id in field_info:
-            for (start_blk, end_blk) in field_info[f.field_id]['day_windows'].values():
-                all_starts.append(start_blk)
-                all_ends.append(end_blk)
-
-    if not all_starts:
-        # profiler.disable()
+    if not any(fi['day_windows'] for fi in field_info.values()):
         return None
 
+    # Resources and days each session may take; interchangeable subfields
+    # (see symmetry.py) get one placement per class, on its representative.
+    # The two-stage engine has one class per top field and cost.
+    telemetry.begin_phase("session_expansion")
+    two_stage = request.engine == "two_stage"
+    resource_classes = top_field_classes(problem) if two_stage else equivalent_resources(problem)
+    representative = {res_id: rep for rep, members in resource_classes.items() for res_id in members}
+    candidates = [
+        [c for c in problem.candidates(s) if representative[c[1]] == c[1]]
+        for s in range(num_sessions)
+    ]
+
     model = cp_model.CpModel()
 
     # --- Create Variables --- 
-    presence_var = {}
-    start_var_main = {}
-    end_var_main = {}
-    interval_var_main = {}
-    demands_capacity_main = {}
-    demands_splits_main = {}
-    session_presence_vars = [[] for _ in range(num_sessions)]
+    telemetry.begin_phase("variables")
+    registry = VariableRegistry()
 
     # Iterate through each session and create potential assignment variables
     for s in range(num_sessions):
-        (
-            sid, team_id, forced_field, req_capacity, length_15,
-            req_field_id, c_start_time, c_day_of_week
-        ) = all_sessions[s]
-        duration_main = length_15
-
-        if forced_field:
-            possible_top_fields = [f for f in top_fields if f.field_id == forced_field]
-            if not possible_top_fields:
-                 continue
-        else:
-            possible_top_fields = top_fields
-
-        # Generate assignment on subfields matching required capacity
-        for f_obj in possible_top_fields:
-            top_id = f_obj.field_id
-            fi = field_info.get(top_id)
-            if not fi or req_capacity not in fi['allowed_demands']:
-                continue
-            for res_id in resource_ids_by_top[top_id]:
-                if capacity_by_id.get(res_id) != req_capacity:
-                    continue
-                # Determine which days to consider based on constraint
-                if c_day_of_week is not None:
-                    days_to_consider = [c_day_of_week]
-                else:
-                    days_to_consider = possible_days
-                    
-                for d in days_to_consider:
-                    if d not in fi['day_windows']:
-                        continue
-                    ws, we = fi['day_windows'][d]
-                    if we - ws < duration_main:
-                        continue
-                    pres = model.NewBoolVar(f'pres_s{sid}_r{res_id}_d{d}')
-                    presence_var[(s, res_id, d)] = pres
-                    session_presence_vars[s].append(pres)
-                    s_var = model.NewIntVar(ws, we - duration_main, f'start_s{sid}_r{res_id}_d{d}')
-                    e_var = model.NewIntVar(ws + duration_main, we, f'end_s{sid}_r{res_id}_d{d}')
-                    interval = model.NewOptionalIntervalVar(s_var, duration_main, e_var, pres, f'interval_s{sid}_r{res_id}_d{d}')
-                    start_var_main[(s, res_id, d)] = s_var
-                    end_var_main[(s, res_id, d)] = e_var
-                    interval_var_main[(s, res_id, d)] = interval
-                    demands_capacity_main[(s, res_id, d)] = req_capacity
-                    # enforce fixed start if specified
-                    if c_start_time is not None:
-                        fb = time_str_to_block(c_start_time)
-                        if ws <= fb <= we - duration_main:
-                            model.Add(s_var == fb).OnlyEnforceIf(pres)
-                        else:
-                            model.Add(pres == 0)
+        sid, team_id, _, req_capacity, duration_main, _, _, _ = all_sessions[s]
+        # candidate windows are pruned already: a fixed start is a single-value start domain
+        for top_id, res_id, d, ws, we in candidates[s]:
+            pres = model.NewBoolVar(f'pres_s{sid}_r{res_id}_d{d}')
+            s_var = model.NewIntVar(ws, we - duration_main, f'start_s{sid}_r{res_id}_d{d}')
+            e_var = model.NewIntVar(ws + duration_main, we, f'end_s{sid}_r{res_id}_d{d}')
+            interval = model.NewOptionalIntervalVar(s_var, duration_main, e_var, pres, f'interval_s{sid}_r{res_id}_d{d}')
+            registry.add((s, res_id, d), team_id, top_id, pres, s_var, e_var, interval, req_capacity)
 
     # Ensure each session is assigned exactly once
+    telemetry.begin_phase("constraints")
     for s in range(num_sessions):
-        if session_presence_vars[s]:
-             model.AddExactlyOne(session_presence_vars[s])
+        session_presences = registry.session_presences(s)
+        if session_presences:
+             model.AddExactlyOne(session_presences)
         else:
-             # profiler.disable()
              return None
 
     # Capacity on top-level and no overlap on each subfield per day
     for top_id, fi in field_info.items():
         cap = fi['total_cap']
         for d in fi['day_windows']:
-            ints_top, demands_top = [], []
-            intervals_by_res_id = defaultdict(list)
-            for res_id_under_top in resource_ids_by_top[top_id]:
-                for s_idx in range(num_sessions):
-                    key = (s_idx, res_id_under_top, d)
-                    if key in interval_var_main:
-                        iv = interval_var_main[key]
-                        intervals_by_res_id[res_id_under_top].append(iv)
-                        ints_top.append(iv)
-                        demands_top.append(demands_capacity_main[key])
-            # no overlap on same resource
-            for specific_intervals in intervals_by_res_id.values():
-                if specific_intervals:
-                    model.AddNoOverlap(specific_intervals)
-            # no overlap for ancestor-descendant resources
-            res_ids = list(intervals_by_res_id.keys())
-            for i in range(len(res_ids)):
-                for j in range(i+1, len(res_ids)):
-                    ra, rb = res_ids[i], res_ids[j]
-                    if ra in ancestor_map.get(rb, set()) or rb in ancestor_map.get(ra, set()):
-                        combined = intervals_by_res_id[ra] + intervals_by_res_id[rb]
-                        if combined:
-                            model.AddNoOverlap(combined)
+            keys_top = registry.by_top_day.get((top_id, d))
+            if not keys_top:
+                continue
+            # resources with at least one candidate interval, in creation order
+            used_res_ids = [] if two_stage else list(dict.fromkeys(key[1] for key in keys_top))
+            # no overlap on same resource; a class of k interchangeable
+            # subfields holds up to k sessions at a time
+            for res_id in used_res_ids:
+                intervals = registry.by_resource_day[(res_id, d)]
+                size = len(resource_classes[res_id])
+                if size == 1:
+                    model.AddNoOverlap(intervals)
+                else:
+                    model.AddCumulative(intervals, [1] * len(intervals), size)
+            # no overlap for ancestor-descendant resources (an ancestor takes a whole class)
+            used_res_set = set(used_res_ids)
+            for res_id in used_res_ids:
+                size = len(resource_classes[res_id])
+                for anc_id in ancestor_map.get(res_id, ()):
+                    if anc_id not in used_res_set:
+                        continue
+                    intervals = registry.by_resource_day[(res_id, d)]
+                    anc_intervals = registry.by_resource_day[(anc_id, d)]
+                    if size == 1:
+                        model.AddNoOverlap(intervals + anc_intervals)
+                    else:
+                        model.AddCumulative(
+                            intervals + anc_intervals,
+                            [1] * len(intervals) + [size] * len(anc_intervals),
+                            size
+                        )
             # cumulative capacity constraint
-            if ints_top:
-                model.AddCumulative(ints_top, demands_top, cap)
+            model.AddCumulative(
+                [registry.interval[key] for key in keys_top],
+                [registry.demand[key] for key in keys_top],
+                cap
+            )
 
     # Add constraint that teams can only have one session per day
     team_sessions = defaultdict(list)
@@ -224,144 +384,211 @@ def generate_schedule(request: GenerateScheduleRequest, solution_callback=None)
         team_id = session_data[1]
         team_sessions[team_id].append(s)
 
-    for team_id, sess_list in team_sessions.items():
-        for d in range(7):
-            bools_for_that_day = [presence_var[k] for k in presence_var if k[0] in sess_list and k[2] == d]
-            if bools_for_that_day:
-                model.Add(sum(bools_for_that_day) <= 1)
+    for bools_for_that_day in registry.by_team_day.values():
+        if len(bools_for_that_day) > 1:
+            model.AddAtMostOne(bools_for_that_day)
 
     # Add objective functions based on request type
+    telemetry.begin_phase("objectives")
     objectives = []
     adjacency_objective = None
     if request.weekday_objective:
-        adjacency_objective = add_adjacency_objective(model, team_sessions, presence_var, top_field_ids)
+        adjacency_objective = add_adjacency_objective(model, team_sessions, registry.by_team_day)
         objectives.append(adjacency_objective)
     if request.start_time_objective:
         # map team to year integer
         team_year_map: Dict[int, int] = {}
         for c in request.constraints:
             team_year_map[c.team_id] = int(c.year.lstrip('U'))
-        objectives.append(add_year_gap_objective(model, team_sessions, presence_var, resource_ids_by_top, team_year_map))
+        year_presence = build_year_presence_index(
+            registry.presence, registry.by_top_day, team_sessions, team_year_map
+        )
+        objectives.append(add_year_gap_objective(model, year_presence))
     if request.weekday_objective and request.start_time_objective:
         # prioritize adjacency then year gap without worsening adjacency score
         model.Minimize(adjacency_objective * 100 + objectives[1])
     elif objectives:
         model.Minimize(sum(objectives))
 
+    telemetry.record_model(model, num_sessions, len(registry.presence))
+
+    # Warm start from a previous schedule: hint every session that still fits
+    # its old placement, and pin those of locked teams
+    telemetry.begin_phase("hints")
+    hints_started = time.monotonic()
+    session_groups = equivalent_sessions(problem)
+    fixed: List[int] = []
+    previous_by_class: Dict[Tuple, List[int]] = defaultdict(list)
+    if request.previous_schedule:
+        # previous placements on a subfield count for its class
+        previous = []
+        for session_id, team_id, field_id, d, start_blk in normalize_previous_schedule(request.previous_schedule):
+            rep = representative.get(field_id, field_id)
+            previous_by_class[(team_id, rep, d, start_blk)].append(field_id)
+            previous.append((session_id, team_id, rep, d, start_blk))
+        matches = match_previous_placements(model, registry, all_sessions, previous)
+        if request.locked_team_ids:
+            locked = set(request.locked_team_ids)
+            fixed += [s for s in matches if all_sessions[s][1] in locked]
+        if request.edit is not None:
+            # only the top fields and days the edit touches are re-optimized
+            fixed += select_unaffected_sessions(
+                all_sessions, previous, matches, problem.top_of,
+                request.edit.changed_team_ids, request.edit.changed_field_ids
+            )
+    else:
+        # otherwise start from the greedy preview schedule
+        greedy, _ = greedy_placements(problem)
+        matches = {s: ((s, representative[res_id], d), start_blk) for s, ((_, res_id, d), start_blk) in greedy.items()}
+
+    # Order interchangeable sessions by day, unless only some of them are pinned
+    fixed_set = set(fixed)
+    session_groups = [
+        group for group in session_groups
+        if all(s in fixed_set for s in group) or not any(s in fixed_set for s in group)
+    ]
+    matches = order_matches(session_groups, matches)
+    # subfield each session had in the previous schedule, kept where still free
+    preferred_res: Dict[int, int] = {}
+    for s, ((_, rep, d), start_blk) in matches.items():
+        previous_res = previous_by_class.get((all_sessions[s][1], rep, d, start_blk))
+        if previous_res:
+            preferred_res[s] = previous_res.pop()
+    add_session_order(model, registry, session_groups)
+    add_solution_hints(model, registry, matches)
+    # completing a partial hint is a search of its own, only worth it when
+    # every session is placed and the model is small
+    if (len(matches) == num_sessions and len(registry.presence) <= HINT_COMPLETION_MAX_PLACEMENTS
+            and not (stop_event is not None and stop_event.is_set())):
+        completion_time = min(HINT_COMPLETION_SECONDS, HINT_COMPLETION_SHARE * settings.time_limit)
+        complete_hints(model, registry, matches, completion_time, stop_event)
+    fix_sessions(model, registry, matches, fixed)
+    if stop_event is not None and stop_event.is_set():
+        telemetry.record_result("UNKNOWN")
+        return None
+    # the warm start counts against the time limit
+    settings = settings.model_copy(update={
+        "time_limit": max(0.0, settings.time_limit - (time.monotonic() - hints_started))
+    })
+
     # Solve the model
+    telemetry.begin_phase("solve")
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 120
-    solver.parameters.num_search_workers = 8
-
-    # Solve with optional solution callback to capture intermediate solutions
-    if solution_callback:
-        # define internal callback to extract current best solution
-        class IntermediateCallback(cp_model.CpSolverSolutionCallback):
-            def __init__(self):
-                super().__init__()
-            def OnSolutionCallback(self):
-                solution = []
-                # extract assignments for each session
-                for s in range(num_sessions):
-                    for (sess_id, res_id, d), pres in presence_var.items():
-                        if sess_id == s and self.Value(pres) == 1:
-                            start_blk = self.Value(start_var_main[(sess_id, res_id, d)])
-                            end_blk = self.Value(end_var_main[(sess_id, res_id, d)])
-                            solution.append({
-                                'session_id': sess_id,
-                                'team_id': all_sessions[s][1],
-                                'day_of_week': idx_to_day[d],
-                                'start_time': blocks_to_time_str(start_blk),
-                                'end_time': blocks_to_time_str(end_blk),
-                                'field_id': res_id,
-                                'required_cost': demands_capacity_main[(sess_id, res_id, d)],
-                                'required_field': all_sessions[s][5]
-                            })
-                # send partial solution
-                solution_callback(solution)
-        callback = IntermediateCallback()
-        status = solver.SolveWithSolutionCallback(model, callback)
+    settings.configure(solver)
+    telemetry.attach(solver)
+
+    # Precompute per-session (presence, start, end) handles for decoding solutions
+    decoder = SolutionDecoder(registry)
+
+    # latest solution the two-stage engine could pack, kept in case the final one cannot be
+    last_packed: Optional[List[Dict]] = None
+
+    def extract_solution(values) -> Optional[List[Dict]]:
+        """
+        Turn the solver's flat value array into the list of session dicts
+        (None if the two-stage engine cannot pack it onto subfields).
+        """
+        nonlocal last_packed
+        if two_stage:
+            placements = pack_subfields(problem, decoder.decode(values), resource_classes, preferred_res)
+            if placements is None:
+                return None
+        else:
+            placements = assign_resources(decoder.decode(values), resource_classes, preferred_res)
+        solution = []
+        for (s, res_id, d), start_blk, end_blk in placements:
+            solution.append(_session_dict(all_sessions[s], res_id, d, start_blk, end_blk))
+        if two_stage:
+            last_packed = solution
+        return solution
+
+    def report(solution: Optional[List[Dict]], progress: Dict[str, float]) -> None:
+        if solution is not None:
+            solution_callback(solution, progress)
+
+    # Record every improving solution and pass it to the optional solution callback
+    def on_solution(callback: cp_model.CpSolverSolutionCallback) -> None:
+        progress = {
+            "objective": callback.ObjectiveValue(),
+            "bound": callback.BestObjectiveBound(),
+            "wall_time": callback.WallTime(),
+        }
+        telemetry.record_solution(progress)
+        if solution_callback:
+            report(extract_solution(callback.response_proto.solution), progress)
+
+    solve_started = time.monotonic()
+    if request.lns is not None:
+        session_team = [session_data[1] for session_data in all_sessions]
+
+        def on_improvement(values, progress):
+            telemetry.record_solution(progress)
+            if solution_callback:
+                report(extract_solution(values), progress)
+        status, lns_solver = run_lns(
+            model, registry, decoder, session_team, problem.top_of, request.lns,
+            settings, on_improvement, stop_event
+        )
+        if lns_solver is not None:
+            solver = lns_solver
     else:
-        status = solver.Solve(model)
+        status = solve_with_stop(solver, model, on_solution, stop_event, settings.no_improvement_timeout)
+    telemetry.record_result(solver.StatusName(status), solver.ResponseStats())
 
     # Process solution if found
     if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        solution_type = "OPTIMAL" if status == cp_model.OPTIMAL else "FEASIBLE (not optimal)"
-        # profiler.disable()
-        # stats = pstats.Stats(profiler).sort_stats('cumtime')
-        # stats.print_stats(10)
+        # a solve stopped by a gap limit also reports OPTIMAL, only trust a closed gap
+        proven = status == cp_model.OPTIMAL and solver.ObjectiveValue() == solver.BestObjectiveBound()
+        solution_type = "OPTIMAL" if proven else "FEASIBLE (not optimal)"
+        telemetry.begin_phase("extraction")
 
-        # Extract solution and format for return
-        solution = []
-        
-        # Print adjacency objective score if weekday objective was used
+        # Adjacency score: sum of the smallest possible longest chains over all teams
         if request.weekday_objective and adjacency_objective is not None:
-            adjacency_score = solver.Value(adjacency_objective)
-            print(f"For this solution, the sum of the smallest possible longest chains for all teams combined is {adjacency_score}")
-        
-        # Print year gap objective score if start time objective was used
+            telemetry.objectives["adjacency"] = solver.Value(adjacency_objective)
+        # Year gap score: the second objective when both are used
         if request.start_time_objective:
-            if request.weekday_objective:
-                # When both objectives are used, year gap is the second part
-                year_gap_score = solver.Value(objectives[1])
-            else:
-                # When only year gap objective is used
-                year_gap_score = solver.Value(objectives[0])
-            print(f"For this solution, the combined smallest possible year gap across all teams is {year_gap_score}")
-        
-        for s in range(num_sessions):
-            session_data = all_sessions[s]
-            sid, team_id, _, req_capacity, _, req_field_id, _, _ = session_data
-
-            chosen_day = None
-            chosen_field = None
-            assigned_start_main = None
-            assigned_end_main = None
-
-            for (sess_id, res_id, d) in presence_var:
-                if sess_id == s and solver.Value(presence_var[(sess_id, res_id, d)]) == 1:
-                    chosen_field = res_id
-                    chosen_day = d
-                    assigned_start_main = solver.Value(start_var_main[(sess_id, res_id, d)])
-                    assigned_end_main = solver.Value(end_var_main[(sess_id, res_id, d)])
-                    break
-
-            if chosen_field is None or chosen_day is None:
-                 continue
-
-            start_str_main = blocks_to_time_str(assigned_start_main)
-            end_str_main   = blocks_to_time_str(assigned_end_main)
-            day_str = idx_to_day.get(chosen_day, "UnknownDay")
-
-            main_session = {
-                "session_id": sid,
-                "team_id": team_id,
-                "day_of_week": day_str,
-                "start_time": start_str_main,
-                "end_time": end_str_main,
-                "field_id": chosen_field,
-                "required_cost": req_capacity,
-                "required_field": req_field_id,
-            }
-            solution.append(main_session)
+            telemetry.objectives["year_gap"] = solver.Value(objectives[-1])
 
-        # Subfield assignment integrated; solution intervals reflect subfield picks
+        # Extract solution and format for return
+        solution = extract_solution(solver.response_proto.solution)
+        remaining = settings.time_limit - (time.monotonic() - solve_started)
+        if solution is None and (remaining <= 0 or (stop_event is not None and stop_event.is_set())):
+            # no time for another solve: fall back to the last solution that could be packed
+            if last_packed is None:
+                return None
+            solution, solution_type = last_packed, "FEASIBLE (not optimal)"
+        elif solution is None:
+            # the subfields of some top field and day cannot hold its sessions:
+            # solve again with every subfield in the model, in the time left
+            return _generate_schedule(
+                request.model_copy(update={
+                    "engine": "exact",
+                    "solver_settings": request.solver_settings.model_copy(update={"time_limit": remaining})
+                }),
+                solution_callback, num_search_workers, stop_event, False, telemetry
+            )
 
-        # run conflict detection on generated solution
-        field_list = list(fields_by_id.values())
-        fieldConflicts(solution, field_list)
-        
-        # run adjacency pattern analysis
-        analyzeAdjacencyPatterns(solution)
-        
+        # Subfield assignment integrated; solution intervals reflect subfield picks
+        telemetry.begin_phase("validation")
         return {
             "solution": solution,
-            "solution_type": solution_type
+            "solution_type": solution_type,
+            # rule check of the generated solution, expected to be empty
+            "violations": [v.model_dump() for v in find_conflicts(solution, request.fields, request.constraints)]
         }
 
+    elif status == cp_model.INFEASIBLE and request.edit is not None and request.previous_schedule:
+        # the kept sessions leave no room for the edit: re-solve everything,
+        # still warm-started from the previous schedule, in the time left
+        remaining = settings.time_limit - (time.monotonic() - solve_started)
+        if remaining <= 0:
+            return None
+        return _generate_schedule(
+            request.model_copy(update={
+                "edit": None,
+                "solver_settings": request.solver_settings.model_copy(update={"time_limit": remaining})
+            }),
+            solution_callback, num_search_workers, stop_event, False, telemetry
+        )
     else:
-        status_str = solver.StatusName(status)
-        # profiler.disable()
-        # stats = pstats.Stats(profiler).sort_stats('cumtime')
-        # stats.print_stats(10)
         return None
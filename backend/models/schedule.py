@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Literal
 from datetime import datetime
 from pydantic.types import UUID4
 
@@ -16,3 +16,24 @@ class ScheduleEntry(BaseModel):
     exdate: Optional[List[datetime]] = None
     summary: Optional[str] = Field(None, max_length=255)
     description: Optional[str] = None
+
+class ScheduledSession(BaseModel):
+    """One placed session in the solver's own format (see main.generate_schedule)."""
+    session_id: Optional[int] = None
+    team_id: int = Field(gt=0)
+    field_id: int = Field(gt=0)
+    day_of_week: Literal['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    start_time: str = Field(pattern=r'^([01]\d|2[0-3]):([0-5]\d)$')
+    end_time: Optional[str] = Field(None, pattern=r'^([01]\d|2[0-3]):([0-5]\d)$')
+
+class ScheduleViolation(BaseModel):
+    """A rule a schedule breaks (see validation.find_conflicts)."""
+    kind: Literal[
+        'unknown_field', 'availability', 'double_booking', 'subfield_overlap',
+        'capacity', 'team_per_day', 'unmet_constraint'
+    ]
+    message: str
+    day_of_week: Optional[str] = None
+    field_id: Optional[int] = None
+    team_id: Optional[int] = None
+    session_ids: List[Optional[int]] = []
@@ -6,8 +6,7 @@ from ortools.sat.python import cp_model
 def add_adjacency_objective(
     model: cp_model.CpModel,
     team_sessions: Dict[int, List[int]],
-    presence_var: Dict[Tuple[int, int, int], cp_model.IntVar],
-    top_field_ids: List[int]
+    presence_by_team_day: Dict[Tuple[int, int], List[cp_model.IntVar]]
 ) -> cp_model.LinearExpr:
     """
     Adds an objective to minimize, for each team, its longest chain of
@@ -18,22 +17,21 @@ def add_adjacency_objective(
     Args:
         model: The CP-SAT model instance
         team_sessions: Dictionary mapping team IDs to a list of their session IDs
-        presence_var: Dictionary mapping (session_id, field_id, day) -> BoolVar
-                      that is 1 if session `session_id` is assigned to field `field_id`
-                      on day `day`.
-        top_field_ids: List of top-level field IDs to consider
+        presence_by_team_day: Dictionary mapping (team_id, day) -> list of BoolVars,
+                      one per candidate placement of any of the team's sessions
+                      on that day (VariableRegistry.by_team_day).
     """
 
     NUM_DAYS = 7
 
     has_session = {}
-    for t_id, sess_list in team_sessions.items():
+    for t_id in team_sessions:
         for d in range(NUM_DAYS):
-            day_bools = []
-            for (sess_id, res_id, day), pres in presence_var.items():
-                if sess_id in sess_list and day == d:
-                    day_bools.append(pres)
-            
+            day_bools = presence_by_team_day.get((t_id, d))
+            if not day_bools:
+                # no candidate placement, the team can never train that day
+                has_session[(t_id, d)] = 0
+                continue
             var = model.NewIntVar(0, 1, f'has_session_t{t_id}_d{d}')
             model.Add(var == sum(day_bools))
             
@@ -60,40 +58,48 @@ def add_adjacency_objective(
             model.Add(chain_max[t_id] >= chain[(t_id, d)])
     return sum(chain_max[t_id] for t_id in team_sessions)
 
-# Add objective to minimize year gap within each full field per day
-def add_year_gap_objective(
-    model: cp_model.CpModel,
-    team_sessions: Dict[int, List[int]],
+def build_year_presence_index(
     presence_var: Dict[Tuple[int, int, int], cp_model.IntVar],
-    resource_ids_by_top: Dict[int, List[int]],
+    keys_by_top_day: Dict[Tuple[int, int], List[Tuple[int, int, int]]],
+    team_sessions: Dict[int, List[int]],
     team_year_map: Dict[int, int]
-) -> cp_model.LinearExpr:
-    # Minimize differences in team years on same full field/day
-    MIN_YEAR, MAX_YEAR = 4, 24
-    NUM_DAYS = 7
-    year_min = {}
-    year_max = {}
-    year_gap = {}
-    # map session to its team year
+) -> Dict[Tuple[int, int], List[Tuple[cp_model.IntVar, int]]]:
+    """
+    Group candidate placements as (top_field_id, day) -> [(presence, team_year)]
+    from the registry's (top, day) index, in a single pass.
+    """
+    MIN_YEAR = 4
     session_year = {}
     for team_id, sess_list in team_sessions.items():
         for s in sess_list:
             session_year[s] = team_year_map.get(team_id, MIN_YEAR)
-    for top_id, subfields in resource_ids_by_top.items():
-        for d in range(NUM_DAYS):
-            y_min = model.NewIntVar(MIN_YEAR, MAX_YEAR, f'year_min_f{top_id}_d{d}')
-            y_max = model.NewIntVar(MIN_YEAR, MAX_YEAR, f'year_max_f{top_id}_d{d}')
-            gap = model.NewIntVar(0, MAX_YEAR - MIN_YEAR, f'year_gap_f{top_id}_d{d}')
-            model.Add(gap == y_max - y_min)
-            year_min[(top_id, d)] = y_min
-            year_max[(top_id, d)] = y_max
-            year_gap[(top_id, d)] = gap
-            for (s, res_id, day), pres in presence_var.items():
-                if day != d or res_id not in subfields:
-                    continue
-                y = session_year[s]
-                # only relate min and max to active sessions
-                model.Add(y_min <= y).OnlyEnforceIf(pres)
-                model.Add(y_max >= y).OnlyEnforceIf(pres)
+    return {
+        top_day: [(presence_var[key], session_year[key[0]]) for key in keys]
+        for top_day, keys in keys_by_top_day.items()
+        if keys
+    }
+
+# Add objective to minimize year gap within each full field per day
+def add_year_gap_objective(
+    model: cp_model.CpModel,
+    year_presence_by_top_day: Dict[Tuple[int, int], List[Tuple[cp_model.IntVar, int]]]
+) -> cp_model.LinearExpr:
+    # Minimize differences in team years on same full field/day.
+    # Only (field, day) cells with at least one candidate placement get variables.
+    year_gap = {}
+    for (top_id, d), placements in year_presence_by_top_day.items():
+        if not placements:
+            continue
+        lo = min(y for _, y in placements)
+        hi = max(y for _, y in placements)
+        y_min = model.NewIntVar(lo, hi, f'year_min_f{top_id}_d{d}')
+        y_max = model.NewIntVar(lo, hi, f'year_max_f{top_id}_d{d}')
+        gap = model.NewIntVar(0, hi - lo, f'year_gap_f{top_id}_d{d}')
+        model.Add(gap == y_max - y_min)
+        year_gap[(top_id, d)] = gap
+        for pres, y in placements:
+            # only relate min and max to active sessions
+            model.Add(y_min <= y).OnlyEnforceIf(pres)
+            model.Add(y_max >= y).OnlyEnforceIf(pres)
     # sum all gaps
-    return sum(year_gap[(top, d)] for top in resource_ids_by_top for d in range(NUM_DAYS))
+    return sum(year_gap.values())
@@ -0,0 +1,73 @@
+"""
+Filename: occupancy.py
+Array-backed occupancy of a club's fields over the week, used by the
+greedy scheduler to check all candidates of a session at once. Everything
+is indexed by resource (top field or subfield) x day x 15-minute block:
+
+    available[top, day, block]  block lies in the top field's availability window
+    booked[res, day, block]     sessions placed on exactly this resource
+    blocked[res, day, block]    sessions on this resource or a related one
+                                (ancestor or descendant), > 0 means in use
+    used_cap[top, day, block]   summed cost of the sessions on the top field
+
+Booking a session updates all related rows at once through a precomputed
+relation mask, so checking a slot never has to look at other sessions.
+"""
+
+from typing import Dict, List
+import numpy as np
+from problem import SchedulingProblem
+
+BLOCKS_PER_DAY = 96
+DAYS_PER_WEEK = 7
+
+class OccupancyGrid:
+
+    def __init__(self, problem: SchedulingProblem):
+        self.res_ids: List[int] = sorted(problem.capacity_by_id)
+        self.res_index: Dict[int, int] = {res_id: i for i, res_id in enumerate(self.res_ids)}
+        self.top_ids: List[int] = [f.field_id for f in problem.top_fields]
+        self.top_index: Dict[int, int] = {top_id: i for i, top_id in enumerate(self.top_ids)}
+
+        self.res_top = np.array([self.top_index[problem.top_of[r]] for r in self.res_ids], dtype=np.int64)
+        self.res_cost = np.array([problem.capacity_by_id[r] for r in self.res_ids], dtype=np.int32)
+        self.top_cap = np.array(
+            [problem.field_info[t]['total_cap'] for t in self.top_ids], dtype=np.int32
+        )
+
+        # related[a, b]: a and b are the same resource, or one contains the other
+        self.related = np.eye(len(self.res_ids), dtype=bool)
+        for res_id, ancestors in problem.ancestor_map.items():
+            for anc_id in ancestors:
+                self.related[self.res_index[res_id], self.res_index[anc_id]] = True
+                self.related[self.res_index[anc_id], self.res_index[res_id]] = True
+
+        # top fields are in field tree order, so the tree's day windows line up
+        blocks = np.arange(BLOCKS_PER_DAY)
+        window = problem.tree.window
+        self.available = (blocks >= window[:, :, :1]) & (blocks < window[:, :, 1:])
+
+        shape = (len(self.res_ids), DAYS_PER_WEEK, BLOCKS_PER_DAY)
+        self.booked = np.zeros(shape, dtype=np.int16)
+        self.blocked = np.zeros(shape, dtype=np.int16)
+        self.used_cap = np.zeros((len(self.top_ids), DAYS_PER_WEEK, BLOCKS_PER_DAY), dtype=np.int32)
+
+    def book(self, res_id: int, d: int, start_blk: int, end_blk: int, count: int = 1) -> None:
+        """Place a session on res_id (count=-1 removes it again)."""
+        r = self.res_index[res_id]
+        self.booked[r, d, start_blk:end_blk] += count
+        self.blocked[self.related[r], d, start_blk:end_blk] += count
+        self.used_cap[self.res_top[r], d, start_blk:end_blk] += count * self.res_cost[r]
+
+    def free_blocks(self, res_idx: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """
+        Bulk availability: free[k, block] for resource index res_idx[k] on
+        day days[k], i.e. inside the window, no related booking, and room for
+        one more session of the resource's cost on its top field.
+        """
+        t = self.res_top[res_idx]
+        return (
+            self.available[t, days]
+            & (self.blocked[res_idx, days] == 0)
+            & (self.used_cap[t, days] + self.res_cost[res_idx][:, None] <= self.top_cap[t][:, None])
+        )
@@ -0,0 +1,119 @@
+"""
+Filename: packing.py
+Stage two of the two-stage engine (GenerateScheduleRequest.engine). Stage
+one places every session on a top field and day under the capacity
+constraint only; here the sessions of each top field and day are packed
+onto concrete subfields of their cost so that no subfield, and no subfield
+together with one of its ancestors, is used twice at the same time.
+
+Sessions go by start time to their preferred subfield if free, otherwise
+to the first free one. If that leaves a session without a subfield (only
+possible when subfields of one cost are nested in each other), the top
+field and day is packed by a small CP-SAT model instead.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from ortools.sat.python import cp_model
+from problem import SchedulingProblem
+from registry import PlacementKey
+
+PACKING_TIME_LIMIT = 1.0  # seconds per top field and day for the CP fallback
+
+Placement = Tuple[PlacementKey, int, int]
+
+def top_field_classes(problem: SchedulingProblem) -> Dict[int, List[int]]:
+    """Resources grouped by top field and cost, as {representative: members} (cf. symmetry.equivalent_resources)."""
+    classes: Dict[int, List[int]] = {}
+    for top_id, res_ids in problem.resource_ids_by_top.items():
+        rep_of_cost: Dict[int, int] = {}
+        for res_id in res_ids:
+            rep = rep_of_cost.setdefault(problem.capacity_by_id[res_id], res_id)
+            classes.setdefault(rep, []).append(res_id)
+    return classes
+
+def _first_fit(
+    problem: SchedulingProblem,
+    placements: List[Placement],
+    options: List[List[int]],
+    preferred: Dict[int, int]
+) -> Optional[List[int]]:
+    busy: List[Tuple[int, int, int]] = []  # (start, end, res_id)
+
+    def free(res_id: int, start_blk: int, end_blk: int) -> bool:
+        return not any(
+            start_blk < b_end and b_start < end_blk and problem.tree.related(res_id, b_res)
+            for b_start, b_end, b_res in busy
+        )
+
+    chosen: List[Optional[int]] = [None] * len(placements)
+    for i, ((s, _, _), start_blk, end_blk) in enumerate(placements):
+        res_id = preferred.get(s)
+        if res_id in options[i] and free(res_id, start_blk, end_blk):
+            busy.append((start_blk, end_blk, res_id))
+            chosen[i] = res_id
+    for i, (_, start_blk, end_blk) in enumerate(placements):
+        if chosen[i] is not None:
+            continue
+        res_id = next((r for r in options[i] if free(r, start_blk, end_blk)), None)
+        if res_id is None:
+            return None
+        busy.append((start_blk, end_blk, res_id))
+        chosen[i] = res_id
+    return chosen
+
+def _solve_packing(
+    problem: SchedulingProblem,
+    placements: List[Placement],
+    options: List[List[int]]
+) -> Optional[List[int]]:
+    model = cp_model.CpModel()
+    x = [{r: model.NewBoolVar(f"x_{i}_{r}") for r in options[i]} for i in range(len(placements))]
+    for i in range(len(placements)):
+        model.AddExactlyOne(x[i].values())
+    for i, (_, start_i, end_i) in enumerate(placements):
+        for j in range(i + 1, len(placements)):
+            _, start_j, end_j = placements[j]
+            if not (start_i < end_j and start_j < end_i):
+                continue
+            for r_i, var_i in x[i].items():
+                for r_j, var_j in x[j].items():
+                    if problem.tree.related(r_i, r_j):
+                        model.AddAtMostOne([var_i, var_j])
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = PACKING_TIME_LIMIT
+    solver.parameters.num_search_workers = 1
+    if solver.Solve(model) not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    return [next(r for r, var in x[i].items() if solver.Value(var)) for i in range(len(placements))]
+
+def pack_subfields(
+    problem: SchedulingProblem,
+    placements: List[Placement],
+    classes: Dict[int, List[int]],
+    preferred: Optional[Dict[int, int]] = None
+) -> Optional[List[Placement]]:
+    """
+    Replace the class representative of every placement (see
+    top_field_classes) by a concrete subfield. Returns None if some top
+    field and day cannot be packed.
+    """
+    preferred = preferred or {}
+    by_top_day: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for i, ((_, res_id, d), _, _) in enumerate(placements):
+        by_top_day[(problem.top_of[res_id], d)].append(i)
+
+    result = list(placements)
+    for indices in by_top_day.values():
+        indices.sort(key=lambda i: placements[i][1])
+        group = [placements[i] for i in indices]
+        options = [classes[res_id] for (_, res_id, _), _, _ in group]
+        chosen = _first_fit(problem, group, options, preferred)
+        if chosen is None:
+            chosen = _solve_packing(problem, group, options)
+            if chosen is None:
+                return None
+        for i, res_id in zip(indices, chosen):
+            (s, _, d), start_blk, end_blk = placements[i]
+            result[i] = ((s, res_id, d), start_blk, end_blk)
+    return result
@@ -0,0 +1,99 @@
+"""
+Filename: problem.py
+A scheduling request in plain Python data, shared by the CP-SAT model
+builder and the greedy preview: resources (top fields and subfields) with
+their cost and ancestors, the day windows of each top field, and one
+session per constraint with the placements it may take. Placements that
+can never be used (a fixed start outside the window, a day another
+session of the team is pinned to) are not enumerated at all.
+"""
+
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+from models.field import Field
+from models.constraint import Constraint
+from field_tree import IDX_TO_DAY, get_field_tree
+from utils import time_str_to_block
+
+# (session_index, team_id, forced_top_field, required_cost, length, required_field_id, start_time, day_of_week)
+Session = Tuple[int, int, Optional[int], int, int, Optional[int], Optional[str], Optional[int]]
+
+# (top_id, res_id, day, window_start_block, window_end_block); the window is
+# the part of the day the session may occupy, for a fixed start exactly its slot
+Candidate = Tuple[int, int, int, int, int]
+
+class SchedulingProblem:
+
+    def __init__(self, fields: List[Field], constraints: List[Constraint]):
+        # the field tree index is shared by all requests with the same fields
+        self.tree = get_field_tree(fields)
+        self.fields_by_id = self.tree.fields_by_id
+        self.top_fields = list(self.tree.top_fields)
+
+        # ancestor_map[field_id] = frozenset of its ancestor ids
+        self.ancestor_map: Mapping[int, FrozenSet[int]] = self.tree.ancestors
+
+        # subfield resources and their cost on the top field
+        self.resource_ids_by_top: Mapping[int, Sequence[int]] = self.tree.resources_by_top
+        self.capacity_by_id: Mapping[int, int] = self.tree.cost_of
+        self.top_of: Mapping[int, int] = self.tree.top_of
+
+        # one session per constraint
+        self.sessions: List[Session] = []
+        # days each team has a session pinned to
+        self.pinned_days: Dict[int, List[int]] = defaultdict(list)
+        for session_index, c in enumerate(constraints):
+            if c.field_id is not None:
+                if c.field_id not in self.top_of:
+                    raise ValueError(f"Unknown required_field {c.field_id}")
+                forced_top_field, final_cost = self.top_of[c.field_id], self.capacity_by_id[c.field_id]
+            else:
+                final_cost = int(c.required_cost) if c.required_cost else 1000
+                forced_top_field = None
+            self.sessions.append((
+                session_index, c.team_id, forced_top_field, final_cost,
+                c.length, c.field_id, c.start_time, c.day_of_week
+            ))
+            if c.day_of_week is not None:
+                self.pinned_days[c.team_id].append(c.day_of_week)
+
+        # capacity, allowed demand types and day windows per top field
+        self.field_info: Mapping[int, Mapping] = self.tree.top_info
+
+    def candidates(self, s: int) -> List[Candidate]:
+        """Resources and days session s may be placed on, with the window it may occupy there."""
+        _, team_id, forced_field, req_capacity, length, _, c_start_time, c_day_of_week = self.sessions[s]
+        if forced_field:
+            possible_top_fields = [f for f in self.top_fields if f.field_id == forced_field]
+        else:
+            possible_top_fields = self.top_fields
+        if c_day_of_week is not None:
+            days_to_consider = [c_day_of_week]
+        else:
+            # a team trains once per day, days pinned by its other sessions are taken
+            taken = set(self.pinned_days.get(team_id, ()))
+            days_to_consider = [d for d in range(7) if d not in taken]
+        fixed_start = time_str_to_block(c_start_time) if c_start_time is not None else None
+
+        result = []
+        for f_obj in possible_top_fields:
+            top_id = f_obj.field_id
+            fi = self.field_info.get(top_id)
+            if not fi or req_capacity not in fi['allowed_demands']:
+                continue
+            for res_id in self.resource_ids_by_top[top_id]:
+                # subfields matching the required capacity
+                if self.capacity_by_id.get(res_id) != req_capacity:
+                    continue
+                for d in days_to_consider:
+                    if d not in fi['day_windows']:
+                        continue
+                    ws, we = fi['day_windows'][d]
+                    if fixed_start is not None:
+                        if not ws <= fixed_start <= we - length:
+                            continue
+                        ws, we = fixed_start, fixed_start + length
+                    if we - ws < length:
+                        continue
+                    result.append((top_id, res_id, d, ws, we))
+        return result
@@ -0,0 +1,91 @@
+"""
+Filename: registry.py
+Indexes the CP-SAT placement variables created by generate_schedule so that
+constraints and objectives can be built without rescanning every placement.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from ortools.sat.python import cp_model
+
+# A placement key is (session_index, resource_id, day)
+PlacementKey = Tuple[int, int, int]
+
+class VariableRegistry:
+    """
+    Holds the presence/start/end/interval variables of every candidate
+    placement together with lookup indexes that are filled in as the
+    variables are created:
+
+        by_session[s]              -> [key, ...]
+        by_team_day[(team, d)]     -> [presence, ...]
+        by_top_day[(top, d)]       -> [key, ...]
+        by_resource_day[(res, d)]  -> [interval, ...]
+    """
+
+    def __init__(self):
+        self.presence: Dict[PlacementKey, cp_model.IntVar] = {}
+        self.start: Dict[PlacementKey, cp_model.IntVar] = {}
+        self.end: Dict[PlacementKey, cp_model.IntVar] = {}
+        self.interval: Dict[PlacementKey, cp_model.IntervalVar] = {}
+        self.demand: Dict[PlacementKey, int] = {}
+        self.by_session: Dict[int, List[PlacementKey]] = defaultdict(list)
+        self.by_team_day: Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
+        self.by_top_day: Dict[Tuple[int, int], List[PlacementKey]] = defaultdict(list)
+        self.by_resource_day: Dict[Tuple[int, int], List[cp_model.IntervalVar]] = defaultdict(list)
+
+    def add(
+        self,
+        key: PlacementKey,
+        team_id: int,
+        top_id: int,
+        pres: cp_model.IntVar,
+        start: cp_model.IntVar,
+        end: cp_model.IntVar,
+        interval: cp_model.IntervalVar,
+        demand: int
+    ) -> None:
+        """Register one candidate placement and update every index."""
+        s, res_id, d = key
+        self.presence[key] = pres
+        self.start[key] = start
+        self.end[key] = end
+        self.interval[key] = interval
+        self.demand[key] = demand
+        self.by_session[s].append(key)
+        self.by_team_day[(team_id, d)].append(pres)
+        self.by_top_day[(top_id, d)].append(key)
+        self.by_resource_day[(res_id, d)].append(interval)
+
+    def session_presences(self, s: int) -> List[cp_model.IntVar]:
+        return [self.presence[key] for key in self.by_session.get(s, [])]
+
+
+class SolutionDecoder:
+    """
+    Precomputed (presence, start, end) variable indices for every placement,
+    ordered by session. A solution is decoded with one vectorized lookup into
+    the solver's flat value array instead of a Value() call per variable.
+    """
+
+    def __init__(self, registry: VariableRegistry):
+        self.keys: List[PlacementKey] = [
+            key for s in sorted(registry.by_session) for key in registry.by_session[s]
+        ]
+        self.presence_idx = np.array([registry.presence[k].Index() for k in self.keys], dtype=np.int64)
+        self.start_idx = np.array([registry.start[k].Index() for k in self.keys], dtype=np.int64)
+        self.end_idx = np.array([registry.end[k].Index() for k in self.keys], dtype=np.int64)
+
+    def decode(self, values: Sequence[int]) -> List[Tuple[PlacementKey, int, int]]:
+        """
+        Given the flat solution values (CpSolverResponse.solution), return
+        (key, start_block, end_block) for every active placement in session order.
+        """
+        if not self.keys:
+            return []
+        values = np.asarray(values, dtype=np.int64)
+        chosen = np.flatnonzero(values[self.presence_idx])
+        starts = values[self.start_idx[chosen]].tolist()
+        ends = values[self.end_idx[chosen]].tolist()
+        return [(self.keys[i], st, en) for i, st, en in zip(chosen.tolist(), starts, ends)]
@@ -2,124 +2,496 @@
 Filename: schedules.py in routes folder
 '''
 
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import traceback
 import uuid
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Union
+from pydantic import BaseModel, Field as PydanticField
 from models.field import Field
 from models.constraint import Constraint
-from main import generate_schedule  # import solver function
+from main import GenerateScheduleRequest, generate_preview
+from scenarios import ScenarioDelta, apply_scenario, compare_scenarios, scenario_time_limit
+from executor import SolverExecutor, QueueFullError  # runs solver in a process pool
+from streaming import JobEventBroker, solution_delta, format_sse
+from jobstore import create_job_store, ACTIVE_STATUSES
+from cache import create_result_cache, request_cache_key
 from utils import convert_response_to_schedule_entries
-from models.schedule import ScheduleEntry
+from models.schedule import ScheduleEntry, ScheduledSession, ScheduleViolation
+from validation import find_conflicts, normalize_schedule
 import threading
 from datetime import datetime
 
 router = APIRouter(prefix="/schedules", tags=["schedules"])
 
-# In-memory job storage (in production, use Redis or database)
-job_storage: Dict[str, Dict[str, Any]] = {}
+# Job storage, configured through JOB_STORE_* environment variables (see jobstore.py)
+job_store = create_job_store()
+# Orders job updates with the stream events published for them in this process
 job_lock = threading.Lock()
+# Finished results by request hash, configured through RESULT_CACHE_* (see cache.py).
+# Like inflight_jobs it is per process: with several uvicorn workers sharing a
+# SQLite job store, a request only hits results solved by the worker it reaches
+result_cache = create_result_cache()
+# Request hash -> job id of the job currently solving it in this process
+inflight_jobs: Dict[str, str] = {}
+# Pushes progress of running jobs to /schedules/stream subscribers
+job_events = JobEventBroker()
 
-class GenerateScheduleRequest(BaseModel):
-    fields: List[Field]
-    constraints: List[Constraint]
-    weekday_objective: bool
-    start_time_objective: bool
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+STREAM_KEEPALIVE_SECONDS = 15
+# How often a stream re-reads the job store, for jobs solved by another worker process
+STREAM_POLL_SECONDS = 1.0
+# Batch records share the job store, under this prefix so they never look like a job id
+BATCH_KEY_PREFIX = "batch:"
 
 class ScheduleResponse(BaseModel):
     entries: List[ScheduleEntry]
     message: str
 
+class PreviewResponse(BaseModel):
+    entries: List[ScheduleEntry]
+    message: str
+    unplaced_session_ids: List[int]  # sessions the heuristic found no room for
+
+class ValidateScheduleRequest(BaseModel):
+    fields: List[Field]
+    schedule: List[Union[ScheduledSession, ScheduleEntry]]
+    # optional: also report constraints the schedule does not fulfil
+    constraints: List[Constraint] = []
+
+class ValidateScheduleResponse(BaseModel):
+    valid: bool
+    # session_ids are the items' session_id, or their position in `schedule`
+    violations: List[ScheduleViolation]
+
 class JobResponse(BaseModel):
     job_id: str
     status: str
 
 class JobStatusResponse(BaseModel):
     job_id: str
-    status: str  # "pending", "running", "completed", "failed"
+    status: str  # "pending", "running", "completed", "failed", "cancelled"
     result: Optional[ScheduleResponse] = None
     error: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
+    queue_position: Optional[int] = None  # 1-based while pending, None otherwise
+    solution_type: Optional[str] = None  # "OPTIMAL" or "FEASIBLE (not optimal)" once completed
+    cached: bool = False  # result was served from the result cache
+    violations: Optional[List[ScheduleViolation]] = None  # rule check of the final solution
+    telemetry: Optional[Dict[str, Any]] = None  # model size, timings and solution timeline, once finished
 
-def background_generate_schedule(job_id: str, request: GenerateScheduleRequest):
-    """Background task to generate schedule"""
+class GenerateBatchRequest(BaseModel):
+    base: GenerateScheduleRequest
+    scenarios: List[ScenarioDelta]
+    # also solve the base request itself, as the first scenario "base"
+    include_base: bool = True
+    # seconds for the whole batch, counting jobs already queued ahead of it;
+    # default: the base request's time limit
+    time_budget: Optional[float] = PydanticField(None, gt=0)
+
+class BatchJob(BaseModel):
+    name: str
+    job_id: str
+    status: str
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    time_limit: float  # seconds each scenario may solve
+    jobs: List[BatchJob]
+
+class ScenarioResult(BaseModel):
+    name: str
+    job_id: str
+    status: str  # a job status, or "expired" once the job left the job store
+    solution_type: Optional[str] = None
+    objective: Optional[float] = None  # of the latest solution
+    bound: Optional[float] = None
+    objectives: Dict[str, float] = {}  # objective parts, once finished
+    violations: Optional[int] = None
+    objective_change: Optional[float] = None  # relative to the first scenario
+    error: Optional[str] = None
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str  # "running" until every scenario job has finished, then "completed"
+    created_at: str
+    time_limit: float
+    scenarios: List[ScenarioResult]
+
+def status_event(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": job["status"],
+        "error": job["error"],
+        "message": job["result"]["message"] if job["result"] else None,
+    }
+
+def solution_event(job: Dict[str, Any], previous: Optional[List[Dict]]) -> Dict[str, Any]:
+    return {
+        "solution_count": job["solution_count"],
+        **(job["progress"] or {}),
+        **solution_delta(previous, job["solution"]),
+    }
+
+def on_job_start(job_id: str):
+    """Mark a job as running once a solver process picks it up"""
     with job_lock:
-        job_storage[job_id]["status"] = "running"
-    # define callback to capture intermediate solutions
-    def partial_callback(solution):
-        entries = convert_response_to_schedule_entries(solution)
-        with job_lock:
-            job_storage[job_id]["result"] = ScheduleResponse(entries=entries, message="Intermediate solution")
+        job = job_store.update(job_id, {"status": "running"}, only_if_status=("pending",))
+        if job:
+            job_events.publish(job_id, "status", status_event(job))
 
-    try:
-        # Call the generate_schedule function
-        result = generate_schedule(request, solution_callback=partial_callback)
-        
-        if result is None:
+def on_job_partial(job_id: str, solution: List[Dict], progress: Dict[str, float]):
+    """Store an intermediate solution reported by the solver process"""
+    entries = convert_response_to_schedule_entries(solution)
+    with job_lock:
+        job = job_store.get(job_id)
+        if job is None:
+            return
+        previous = job["solution"]
+        job = job_store.update(job_id, {
+            "result": ScheduleResponse(entries=entries, message="Intermediate solution").model_dump(mode="json"),
+            "progress": progress,
+            "solution": solution,
+            "solution_count": job["solution_count"] + 1
+        }, only_if_status=("running",))
+        if job:
+            job_events.publish(job_id, "solution", solution_event(job, previous))
+
+def forget_inflight(job_id: str, job: Optional[Dict[str, Any]]):
+    """Stop coalescing new requests onto a job (call with job_lock held)"""
+    if job and inflight_jobs.get(job["cache_key"]) == job_id:
+        del inflight_jobs[job["cache_key"]]
+
+def on_job_finish(job_id: str, result: Optional[Dict], error: Optional[str]):
+    """Store the final outcome of a solver process"""
+    with job_lock:
+        job = job_store.get(job_id)
+        forget_inflight(job_id, job)
+    if error is None and result is None:
+        if job and (job["status"] == "cancelled" or job.get("stop_requested")):
+            # stopped before any solution: that says nothing about feasibility
             with job_lock:
-                job_storage[job_id]["status"] = "failed"
-                job_storage[job_id]["error"] = "No feasible schedule found."
-                job_storage[job_id]["completed_at"] = datetime.utcnow().isoformat()
+                job = job_store.update(job_id, {
+                    "status": "cancelled",
+                    "error": "Stopped before a solution was found.",
+                    "completed_at": datetime.utcnow().isoformat()
+                }, only_if_status=ACTIVE_STATUSES)
+                if job:
+                    job_events.publish(job_id, "status", status_event(job))
             return
-        
-        entries = convert_response_to_schedule_entries(result["solution"])
-        solution_type = result.get("solution_type", "UNKNOWN")
-        message = f"Found a {solution_type} solution!"
-        
-        schedule_response = ScheduleResponse(entries=entries, message=message)
-        
-        with job_lock:
-            job_storage[job_id]["status"] = "completed"
-            job_storage[job_id]["result"] = schedule_response
-            job_storage[job_id]["completed_at"] = datetime.utcnow().isoformat()
-        
-    except ValueError as ve:
+        error = "No feasible schedule found."
+    if error is not None:
         with job_lock:
-            job_storage[job_id]["status"] = "failed"
-            job_storage[job_id]["error"] = str(ve)
-            job_storage[job_id]["completed_at"] = datetime.utcnow().isoformat()
-    except Exception as e:
-        with job_lock:
-            job_storage[job_id]["status"] = "failed"
-            job_storage[job_id]["error"] = str(e)
-            job_storage[job_id]["completed_at"] = datetime.utcnow().isoformat()
+            job = job_store.update(job_id, {
+                "status": "failed",
+                "error": error,
+                "completed_at": datetime.utcnow().isoformat()
+            }, only_if_status=ACTIVE_STATUSES)
+            if job:
+                job_events.publish(job_id, "status", status_event(job))
+        return
+
+    entries = convert_response_to_schedule_entries(result["solution"])
+    solution_type = result.get("solution_type", "UNKNOWN")
+    message = f"Found a {solution_type} solution!"
+
+    schedule_response = ScheduleResponse(entries=entries, message=message)
+
+    with job_lock:
+        job = job_store.get(job_id)
+        if job is None or job["status"] not in ACTIVE_STATUSES:
+            return
+        previous = job["solution"]
+        changes = {
+            "status": "completed",
+            "result": schedule_response.model_dump(mode="json"),
+            "solution_type": solution_type,
+            "violations": result.get("violations", []),
+            "completed_at": datetime.utcnow().isoformat()
+        }
+        if previous != result["solution"]:
+            changes["solution"] = result["solution"]
+            changes["solution_count"] = job["solution_count"] + 1
+        job = job_store.update(job_id, changes, only_if_status=ACTIVE_STATUSES)
+        if job:
+            if previous != result["solution"]:
+                job_events.publish(job_id, "solution", solution_event(job, previous))
+            job_events.publish(job_id, "status", status_event(job))
+            # a search that was stopped early is not what a fresh solve would return
+            if not job["stop_requested"]:
+                result_cache.put(job["cache_key"], {
+                    "solution": result["solution"],
+                    "solution_type": solution_type,
+                    "violations": job["violations"]
+                })
+
+def on_job_telemetry(job_id: str, telemetry: Dict[str, Any]):
+    """Store the telemetry a solver process collected for a job"""
+    with job_lock:
+        job_store.update(job_id, {"telemetry": telemetry})
+
+def should_stop_job(job_id: str) -> bool:
+    """Whether cancel or stop was requested for a job, possibly through another worker process"""
+    job = job_store.get(job_id)
+    return job is not None and (job["status"] == "cancelled" or job.get("stop_requested", False))
+
+solver_executor = SolverExecutor(
+    on_start=on_job_start,
+    on_partial=on_job_partial,
+    on_finish=on_job_finish,
+    on_telemetry=on_job_telemetry,
+    should_stop=should_stop_job
+)
+
+def new_job_record(cache_key: str) -> Dict[str, Any]:
+    return {
+        "status": "pending",
+        "result": None,
+        "error": None,
+        "created_at": datetime.utcnow().isoformat(),
+        "completed_at": None,
+        "solution": None,  # latest solution as session dicts, for streaming deltas
+        "progress": None,  # objective/bound/wall_time of the latest solution
+        "solution_count": 0,
+        "stop_requested": False,
+        "solution_type": None,
+        "violations": None,
+        "telemetry": None,
+        "cache_key": cache_key,
+        "cached": False
+    }
+
+def submit_job(request: GenerateScheduleRequest) -> JobResponse:
+    """
+    Queue one solve. A request identical to a recently solved one completes
+    immediately from the result cache, and one identical to a request that
+    is still being solved joins that job; both only within this worker
+    process. Raises QueueFullError.
+    """
+    request_data = request.model_dump(mode="json")
+    cache_key = request_cache_key(request_data)
+
+    with job_lock:
+        # coalesce onto a running job for the same request
+        inflight_id = inflight_jobs.get(cache_key)
+        if inflight_id is not None:
+            inflight = job_store.get(inflight_id)
+            if inflight and inflight["status"] in ACTIVE_STATUSES:
+                return JobResponse(job_id=inflight_id, status=inflight["status"])
 
-@router.post("/generate", response_model=JobResponse)
-async def generate_schedule_route(
-    request: GenerateScheduleRequest,
-    background_tasks: BackgroundTasks
-):
-    """Start schedule generation as background job"""
-    try:
         # Generate unique job ID
         job_id = str(uuid.uuid4())
-        
+        record = new_job_record(cache_key)
+
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            entries = convert_response_to_schedule_entries(cached["solution"])
+            message = f"Found a {cached['solution_type']} solution!"
+            record.update({
+                "status": "completed",
+                "result": ScheduleResponse(entries=entries, message=message).model_dump(mode="json"),
+                "completed_at": record["created_at"],
+                "solution": cached["solution"],
+                "solution_count": 1,
+                "solution_type": cached["solution_type"],
+                "violations": cached["violations"],
+                "cached": True
+            })
+            job_store.create(job_id, record)
+            return JobResponse(job_id=job_id, status="completed")
+
         # Initialize job in storage
+        job_store.create(job_id, record)
+        inflight_jobs[cache_key] = job_id
+
+    # Hand the job to the solver process pool
+    try:
+        solver_executor.submit(job_id, request_data)
+    except QueueFullError:
         with job_lock:
-            job_storage[job_id] = {
-                "status": "pending",
-                "result": None,
-                "error": None,
-                "created_at": datetime.utcnow().isoformat(),
-                "completed_at": None
-            }
-        
-        # Add background task
-        background_tasks.add_task(background_generate_schedule, job_id, request)
-        
-        return JobResponse(job_id=job_id, status="pending")
-        
+            inflight_jobs.pop(cache_key, None)
+            job_store.delete(job_id)
+        raise
+
+    return JobResponse(job_id=job_id, status="pending")
+
+@router.post("/generate", response_model=JobResponse)
+def generate_schedule_route(request: GenerateScheduleRequest):
+    """Queue schedule generation on the solver executor (see submit_job)"""
+    try:
+        return submit_job(request)
+    except QueueFullError as qe:
+        raise HTTPException(status_code=429, detail=str(qe))
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate-batch", response_model=BatchResponse)
+def generate_batch_route(request: GenerateBatchRequest):
+    """
+    Queue one job per what-if scenario of a base request (see scenarios.py).
+    The jobs run in parallel on the solver executor and share time_budget:
+    each gets the budget divided by the number of waves the executor needs
+    for them and the jobs already queued or running ahead of them. Compare
+    their objectives through /schedules/batch.
+    """
+    names = [d.name for d in request.scenarios]
+    if request.include_base:
+        names.insert(0, "base")
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=422, detail="Scenario names must be unique")
+    if not request.scenarios and not request.include_base:
+        raise HTTPException(status_code=422, detail="No scenarios to solve")
+    try:
+        requests = [apply_scenario(request.base, delta) for delta in request.scenarios]
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+    if request.include_base:
+        requests.insert(0, request.base)
+
+    budget = request.time_budget or request.base.solver_settings.resolve(solver_executor.workers_per_solve).time_limit
+    time_limit = scenario_time_limit(
+        budget, len(requests), solver_executor.max_concurrent_solves, solver_executor.active_jobs()
+    )
+    for i, scenario in enumerate(requests):
+        settings = scenario.solver_settings
+        own_limit = settings.resolve(solver_executor.workers_per_solve).time_limit
+        requests[i] = scenario.model_copy(update={
+            "solver_settings": settings.model_copy(update={"time_limit": min(own_limit, time_limit)})
+        })
+
+    if solver_executor.queue_space() < len(requests):
+        raise HTTPException(status_code=429, detail=f"Solver queue has no room for {len(requests)} jobs")
+    jobs = []
+    try:
+        for name, scenario in zip(names, requests):
+            job = submit_job(scenario)
+            jobs.append(BatchJob(name=name, job_id=job.job_id, status=job.status))
+    except QueueFullError as qe:
+        # the queue filled up meanwhile; jobs already queued still run
+        raise HTTPException(status_code=429, detail=str(qe))
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    batch_id = str(uuid.uuid4())
+    job_store.create(BATCH_KEY_PREFIX + batch_id, {
+        "status": "completed",  # the record itself is final, only its jobs change
+        "created_at": datetime.utcnow().isoformat(),
+        "time_limit": time_limit,
+        "jobs": [job.model_dump() for job in jobs]
+    })
+    return BatchResponse(batch_id=batch_id, time_limit=time_limit, jobs=jobs)
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+def get_batch_status(batch_id: str):
+    """Status of the jobs of a batch and a comparison of their objective values"""
+    batch = job_store.get(BATCH_KEY_PREFIX + batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    jobs = [job_store.get(job["job_id"]) for job in batch["jobs"]]
+    rows = compare_scenarios([job["name"] for job in batch["jobs"]], jobs)
+    scenarios = [ScenarioResult(job_id=job["job_id"], **row) for job, row in zip(batch["jobs"], rows)]
+    running = any(job is not None and job["status"] in ACTIVE_STATUSES for job in jobs)
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        status="running" if running else "completed",
+        created_at=batch["created_at"],
+        time_limit=batch["time_limit"],
+        scenarios=scenarios
+    )
+
+@router.post("/preview", response_model=PreviewResponse)
+def preview_schedule_route(request: GenerateScheduleRequest):
+    """
+    Instant schedule from the greedy heuristic, returned directly without a
+    job. Meant for first paint while /generate is still solving.
+    """
+    try:
+        result = generate_preview(request)
+    except ValueError as ve:
+        # invalid input, e.g. a session pinned to an unknown field
+        raise HTTPException(status_code=422, detail=str(ve))
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+    unplaced = result["unplaced_session_ids"]
+    message = "Preview schedule" if not unplaced else f"Preview schedule, {len(unplaced)} sessions could not be placed"
+    return PreviewResponse(
+        entries=convert_response_to_schedule_entries(result["solution"]),
+        message=message,
+        unplaced_session_ids=unplaced
+    )
+
+@router.post("/validate", response_model=ValidateScheduleResponse)
+def validate_schedule_route(request: ValidateScheduleRequest):
+    """Check a schedule against fields (and optionally constraints) without solving"""
+    try:
+        schedule = normalize_schedule(request.schedule)
+        violations = find_conflicts(schedule, request.fields, request.constraints)
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+    return ValidateScheduleResponse(valid=not violations, violations=violations)
+
+def _get_active_job(job_id: str) -> Dict[str, Any]:
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    return job
+
+@router.post("/cancel/{job_id}", response_model=JobResponse)
+def cancel_job(job_id: str):
+    """Cancel a job: end its search and discard any solution found so far"""
+    with job_lock:
+        _get_active_job(job_id)
+        job = job_store.update(job_id, {
+            "status": "cancelled",
+            "result": None,
+            "completed_at": datetime.utcnow().isoformat()
+        }, only_if_status=ACTIVE_STATUSES)
+        if job is None:
+            # finished between the check and the update
+            return JobResponse(job_id=job_id, status=job_store.get(job_id)["status"])
+        # a job dequeued below never reaches on_job_finish
+        forget_inflight(job_id, job)
+        job_events.publish(job_id, "status", status_event(job))
+
+    solver_executor.request_stop(job_id)
+    return JobResponse(job_id=job_id, status="cancelled")
+
+@router.post("/stop/{job_id}", response_model=JobResponse)
+def stop_job(job_id: str):
+    """
+    Stop a job early: end its search and complete it with the best solution
+    found so far. A job that is still queued has no solution and is cancelled.
+    """
+    job = _get_active_job(job_id)
+
+    # also tells the owning worker process, if that is not this one
+    job = job_store.update(job_id, {"stop_requested": True}, only_if_status=ACTIVE_STATUSES) or job
+    outcome = solver_executor.request_stop(job_id)
+    if outcome == "dequeued":
+        with job_lock:
+            job = job_store.update(job_id, {
+                "status": "cancelled",
+                "completed_at": datetime.utcnow().isoformat()
+            }, only_if_status=ACTIVE_STATUSES)
+            forget_inflight(job_id, job)
+            if job:
+                job_events.publish(job_id, "status", status_event(job))
+        return JobResponse(job_id=job_id, status="cancelled")
+
+    # the solver process reports the promoted solution through on_job_finish
+    return JobResponse(job_id=job_id, status=job["status"])
+
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
+def get_job_status(job_id: str):
     """Get status of a schedule generation job"""
-    with job_lock:
-        job_data = job_storage.get(job_id)
+    job_data = job_store.get(job_id)
     
     if not job_data:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -130,6 +502,107 @@ async def get_job_status(job_id: str):
         result=job_data["result"],
         error=job_data["error"],
         created_at=job_data["created_at"],
-        completed_at=job_data["completed_at"]
+        completed_at=job_data["completed_at"],
+        queue_position=solver_executor.queue_position(job_id) if job_data["status"] == "pending" else None,
+        solution_type=job_data["solution_type"],
+        cached=job_data["cached"],
+        violations=job_data.get("violations"),
+        telemetry=job_data.get("telemetry")
     )
 
+@router.get("/telemetry/{job_id}")
+def get_job_telemetry(job_id: str):
+    """Download a finished job's solver telemetry as a JSON file"""
+    job_data = job_store.get(job_id)
+    if not job_data:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_data.get("telemetry"):
+        raise HTTPException(status_code=404, detail="No telemetry recorded for this job")
+    return JSONResponse(
+        job_data["telemetry"],
+        headers={"Content-Disposition": f'attachment; filename="telemetry-{job_id}.json"'}
+    )
+
+@router.get("/stream/{job_id}")
+async def stream_job(job_id: str, delta: bool = True):
+    """
+    Server-Sent Events stream of a job's progress.
+
+    "solution" events carry solution_count, objective, bound and wall_time of
+    each improving solution. With delta=true (default) they carry the sessions
+    that changed since the previous event ("changed") and the session ids that
+    disappeared ("removed"); the first event is relative to an empty schedule.
+    With delta=false every event carries the full "entries" list instead.
+    "status" events report status changes; the stream ends with a final status.
+    Jobs solved in this process are pushed as they happen; jobs solved by
+    another worker process are picked up from the job store every
+    STREAM_POLL_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+
+    def subscribe() -> Optional[asyncio.Queue]:
+        # runs in the threadpool: the store and job_lock may block
+        with job_lock:
+            job = job_store.get(job_id)
+            if not job:
+                return None
+            queue = job_events.subscribe(job_id, loop)
+            # replay the current state so late subscribers start from a full picture;
+            # queued on the loop ahead of any event published after job_lock is released
+            if job["solution"] is not None:
+                loop.call_soon_threadsafe(queue.put_nowait, ("solution", solution_event(job, None)))
+            loop.call_soon_threadsafe(queue.put_nowait, ("status", status_event(job)))
+            return queue
+
+    queue = await run_in_threadpool(subscribe)
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        current: Dict[int, Dict] = {}
+        seen_count, seen_status = 0, None
+        idle = 0.0
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), STREAM_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    event, data = None, None
+                    job = await run_in_threadpool(job_store.get, job_id)
+                    if job is None:
+                        return
+                    if job["solution_count"] > seen_count:
+                        event, data = "solution", solution_event(job, list(current.values()))
+                    elif job["status"] != seen_status:
+                        event, data = "status", status_event(job)
+                    else:
+                        idle += STREAM_POLL_SECONDS
+                        if idle >= STREAM_KEEPALIVE_SECONDS:
+                            idle = 0.0
+                            yield ": keepalive\n\n"
+                        continue
+                idle = 0.0
+                if event == "solution":
+                    if data["solution_count"] <= seen_count:
+                        continue  # already delivered
+                    seen_count = data["solution_count"]
+                    for sid in data["removed"]:
+                        current.pop(sid, None)
+                    for sess in data["changed"]:
+                        current[sess["session_id"]] = sess
+                    if not delta:
+                        data = {k: v for k, v in data.items() if k not in ("changed", "removed")}
+                        data["entries"] = sorted(current.values(), key=lambda sess: sess["session_id"])
+                else:
+                    seen_status = data["status"]
+                yield format_sse(event, data)
+                if event == "status" and data["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            job_events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
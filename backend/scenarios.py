@@ -0,0 +1,119 @@
+"""
+Filename: scenarios.py
+What-if scenarios for /schedules/generate-batch. A scenario is a delta on a
+base request: fields closed or added, teams removed or sessions added, the
+objectives switched on or off. Each scenario becomes a complete
+GenerateScheduleRequest that is solved as its own job; scenarios that keep
+the base fields share the cached FieldTree (field_tree.get_field_tree) in
+the solver processes.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Set, Union
+from pydantic import BaseModel
+from models.constraint import Constraint
+from models.field import Field, SubField
+from main import GenerateScheduleRequest
+from utils import build_fields_by_id
+
+class ScenarioDelta(BaseModel):
+    name: str
+    # fields (top fields or subfields) taken out; closing a field closes its subfields
+    closed_field_ids: List[int] = []
+    added_fields: List[Field] = []
+    # teams whose sessions are dropped, and sessions added on top
+    removed_team_ids: List[int] = []
+    added_constraints: List[Constraint] = []
+    # None keeps the base request's setting
+    weekday_objective: Optional[bool] = None
+    start_time_objective: Optional[bool] = None
+
+def _without_closed(field: Union[Field, SubField], closed: Set[int]) -> Union[Field, SubField]:
+    # subfields may nest to any depth, and a SubField's lists may be None
+    changes = {}
+    for attr in ("half_subfields", "quarter_subfields"):
+        subfields = getattr(field, attr)
+        if subfields is not None:
+            changes[attr] = [_without_closed(sf, closed) for sf in subfields if sf.field_id not in closed]
+    return field.model_copy(update=changes)
+
+def _close_fields(fields: List[Field], closed: Set[int]) -> List[Field]:
+    return [_without_closed(f, closed) for f in fields if f.field_id not in closed]
+
+def apply_scenario(base: GenerateScheduleRequest, delta: ScenarioDelta) -> GenerateScheduleRequest:
+    """
+    The request of one scenario. Raises ValueError if a remaining session is
+    pinned to a closed field.
+    """
+    fields = _close_fields(base.fields, set(delta.closed_field_ids)) + delta.added_fields
+    removed = set(delta.removed_team_ids)
+    constraints = [c for c in base.constraints if c.team_id not in removed] + delta.added_constraints
+
+    open_ids, _ = build_fields_by_id(fields)
+    for c in constraints:
+        if c.field_id is not None and c.field_id not in open_ids:
+            raise ValueError(f"Scenario {delta.name!r}: team {c.team_id} has a session pinned to closed field {c.field_id}")
+
+    changes: Dict[str, Any] = {"fields": fields, "constraints": constraints}
+    if delta.weekday_objective is not None:
+        changes["weekday_objective"] = delta.weekday_objective
+    if delta.start_time_objective is not None:
+        changes["start_time_objective"] = delta.start_time_objective
+    if removed or delta.added_constraints:
+        # the previous schedule no longer matches the sessions; keep it only as a hint
+        changes["edit"] = None
+        changes["locked_team_ids"] = [t for t in base.locked_team_ids if t not in removed]
+    return base.model_copy(update=changes)
+
+def scenario_time_limit(
+    time_budget: float,
+    num_scenarios: int,
+    max_concurrent_solves: int,
+    jobs_ahead: int = 0
+) -> float:
+    """
+    Time limit of each scenario so that all of them finish within
+    time_budget: scenarios run max_concurrent_solves at a time, in waves,
+    after the jobs_ahead jobs already running or queued. Those are assumed
+    to take no longer than a scenario; a longer one still delays the batch.
+    """
+    waves = math.ceil((jobs_ahead + num_scenarios) / max(1, max_concurrent_solves))
+    return time_budget / max(1, waves)
+
+def _objective_parts(telemetry: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    # decomposed solves report their objectives per component
+    if not telemetry:
+        return {}
+    parts: Dict[str, float] = dict(telemetry.get("objectives") or {})
+    for component in telemetry.get("components") or []:
+        for key, value in (component.get("objectives") or {}).items():
+            parts[key] = parts.get(key, 0) + value
+    return parts
+
+def compare_scenarios(names: List[str], jobs: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    One row per scenario: status, objective (of the latest solution), its
+    parts, violations and the difference to the first scenario's objective.
+    """
+    rows = []
+    reference: Optional[float] = None
+    for i, (name, job) in enumerate(zip(names, jobs)):
+        if job is None:
+            rows.append({"name": name, "status": "expired"})
+            continue
+        progress = job.get("progress") or {}
+        objective = progress.get("objective")
+        if i == 0:
+            reference = objective
+        rows.append({
+            "name": name,
+            "status": job["status"],
+            "solution_type": job["solution_type"],
+            "objective": objective,
+            "bound": progress.get("bound"),
+            "objectives": _objective_parts(job.get("telemetry")),
+            "violations": len(job["violations"]) if job.get("violations") is not None else None,
+            "objective_change": objective - reference if objective is not None and reference is not None else None,
+            "error": job["error"],
+        })
+    return rows
@@ -0,0 +1,278 @@
+"""
+Filename: search.py
+Search drivers around a built CP-SAT model: solver settings and presets, a
+single solve that can be stopped from another thread, and a Large
+Neighborhood Search (LNS) loop that repeatedly re-optimizes part of the
+schedule while fixing the rest.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Literal, Optional, Sequence, Set, Tuple
+from ortools.sat.python import cp_model
+from pydantic import BaseModel, Field
+from registry import VariableRegistry, SolutionDecoder
+
+STOP_POLL_INTERVAL = 0.1  # seconds between checks of a stop_event during solve
+
+# Server-side defaults and limits, overridable through the environment
+DEFAULT_PRESET = os.environ.get("SOLVER_DEFAULT_PRESET", "balanced")
+MAX_TIME_LIMIT = float(os.environ.get("SOLVER_MAX_TIME_LIMIT", 600))
+
+Preset = Literal["preview", "balanced", "final"]
+Neighbourhood = Literal["field_week", "day", "team_group"]
+
+class SolverSettings(BaseModel):
+    """
+    CP-SAT limits for one solve. Unset values come from the preset:
+        preview  - a quick usable schedule, stops within 5 % of the bound
+        balanced - the default, stops within 1 % or after 30 s without improvement
+        final    - runs until optimal or the time limit
+    The time limit is capped at MAX_TIME_LIMIT and the worker count at what
+    the server gives each solve.
+    """
+    preset: Optional[Preset] = None
+    time_limit: Optional[float] = Field(None, gt=0)  # seconds
+    num_workers: Optional[int] = Field(None, ge=1)
+    relative_gap: Optional[float] = Field(None, ge=0)  # stop when (objective - bound) / objective is below
+    absolute_gap: Optional[float] = Field(None, ge=0)  # stop when objective - bound is below
+    no_improvement_timeout: Optional[float] = Field(None, gt=0)  # seconds without a better solution
+    deterministic_time: Optional[float] = Field(None, gt=0)  # reproducible work limit, in CP-SAT's deterministic seconds
+    seed: Optional[int] = None
+
+    def resolve(self, max_workers: int) -> "SolverSettings":
+        """Fill unset values from the preset and apply the server-side limits."""
+        preset = self.preset or DEFAULT_PRESET
+        values = {**PRESETS[preset], **self.model_dump(exclude_none=True), "preset": preset}
+        values["time_limit"] = min(values["time_limit"], MAX_TIME_LIMIT)
+        values["num_workers"] = min(values.get("num_workers", max_workers), max_workers)
+        return SolverSettings(**values)
+
+    def configure(self, solver: cp_model.CpSolver) -> None:
+        """Copy the (resolved) settings onto a solver's parameters."""
+        params = solver.parameters
+        params.max_time_in_seconds = self.time_limit
+        params.num_search_workers = self.num_workers
+        if self.relative_gap is not None:
+            params.relative_gap_limit = self.relative_gap
+        if self.absolute_gap is not None:
+            params.absolute_gap_limit = self.absolute_gap
+        if self.deterministic_time is not None:
+            params.max_deterministic_time = self.deterministic_time
+        if self.seed is not None:
+            params.random_seed = self.seed
+
+PRESETS: Dict[str, Dict] = {
+    "preview": {"time_limit": 10, "relative_gap": 0.05, "no_improvement_timeout": 3},
+    "balanced": {"time_limit": 120, "relative_gap": 0.01, "no_improvement_timeout": 30},
+    "final": {"time_limit": 600},
+}
+
+class LnsSettings(BaseModel):
+    """
+    Large Neighborhood Search configuration.
+        field_week - free every session on one top field, all week
+        day        - free every session on one day, all fields
+        team_group - free all sessions of a group of teams sharing fields
+    Time limit, workers and seed come from the request's SolverSettings.
+    """
+    neighbourhoods: List[Neighbourhood] = Field(["field_week", "day", "team_group"], min_length=1)
+    initial_time: float = Field(20, gt=0)  # full-model solve that provides the starting solution
+    iteration_time: float = Field(5, gt=0)  # time limit of each neighbourhood re-solve
+    team_group_size: int = Field(8, ge=1)
+
+class _SolutionCallback(cp_model.CpSolverSolutionCallback):
+    """Records when the last (improving) solution arrived and forwards it to on_solution."""
+
+    def __init__(self, on_solution: Optional[Callable[[cp_model.CpSolverSolutionCallback], None]]):
+        super().__init__()
+        self.on_solution = on_solution
+        self.last_solution_at: Optional[float] = None
+
+    def OnSolutionCallback(self):
+        self.last_solution_at = time.monotonic()
+        if self.on_solution:
+            self.on_solution(self)
+
+def _stop_when(
+    solver: cp_model.CpSolver,
+    callback: _SolutionCallback,
+    stop_event: Optional[threading.Event],
+    no_improvement_timeout: Optional[float],
+    solve_done: threading.Event
+) -> None:
+    """Stop the running search once stop_event is set or the search stalls (retried until the solve returns)."""
+    while not solve_done.wait(STOP_POLL_INTERVAL):
+        stalled = (
+            no_improvement_timeout is not None and callback.last_solution_at is not None
+            and time.monotonic() - callback.last_solution_at > no_improvement_timeout
+        )
+        if stalled or (stop_event is not None and stop_event.is_set()):
+            solver.StopSearch()
+
+def solve_with_stop(
+    solver: cp_model.CpSolver,
+    model: cp_model.CpModel,
+    on_solution: Optional[Callable[[cp_model.CpSolverSolutionCallback], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    no_improvement_timeout: Optional[float] = None
+) -> int:
+    """
+    solver.Solve(model) calling on_solution(callback) for every solution.
+    Ends early once stop_event is set or no better solution was found for
+    no_improvement_timeout seconds.
+    """
+    callback = _SolutionCallback(on_solution)
+    solve_done = threading.Event()
+    if stop_event is not None or no_improvement_timeout is not None:
+        threading.Thread(
+            target=_stop_when, args=(solver, callback, stop_event, no_improvement_timeout, solve_done), daemon=True
+        ).start()
+    try:
+        return solver.Solve(model, callback)
+    finally:
+        solve_done.set()
+
+def _free_sessions(
+    kind: Neighbourhood,
+    placements: List[Tuple[Tuple[int, int, int], int, int]],
+    session_team: Sequence[int],
+    top_of: Dict[int, int],
+    team_group_size: int,
+    rng: random.Random
+) -> Set[int]:
+    """Pick one neighbourhood of the given kind around the current placements."""
+    if kind == "field_week":
+        top_id = rng.choice(sorted({top_of[res_id] for (_, res_id, _), _, _ in placements}))
+        return {s for (s, res_id, _), _, _ in placements if top_of[res_id] == top_id}
+    if kind == "day":
+        day = rng.choice(sorted({d for (_, _, d), _, _ in placements}))
+        return {s for (s, _, d), _, _ in placements if d == day}
+
+    # team_group: grow from a random team through teams that share a field and day
+    teams_by_cell: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+    cells_by_team: Dict[int, Set[Tuple[int, int]]] = defaultdict(set)
+    for (s, res_id, d), _, _ in placements:
+        cell = (top_of[res_id], d)
+        teams_by_cell[cell].add(session_team[s])
+        cells_by_team[session_team[s]].add(cell)
+    group = {rng.choice(sorted(cells_by_team))}
+    frontier = list(group)
+    while frontier and len(group) < team_group_size:
+        team = frontier.pop(rng.randrange(len(frontier)))
+        for cell in cells_by_team[team]:
+            for other in sorted(teams_by_cell[cell] - group):
+                if len(group) >= team_group_size:
+                    break
+                group.add(other)
+                frontier.append(other)
+    return {s for (s, _, _), _, _ in placements if session_team[s] in group}
+
+def _within_gap(settings: SolverSettings, objective: float, bound: float) -> bool:
+    gap = abs(objective - bound)
+    if settings.absolute_gap is not None and gap <= settings.absolute_gap:
+        return True
+    return settings.relative_gap is not None and gap <= settings.relative_gap * max(abs(objective), 1)
+
+def run_lns(
+    model: cp_model.CpModel,
+    registry: VariableRegistry,
+    decoder: SolutionDecoder,
+    session_team: Sequence[int],
+    top_of: Dict[int, int],
+    settings: LnsSettings,
+    solver_settings: SolverSettings,
+    on_improvement: Optional[Callable[[Sequence[int], Dict[str, float]], None]] = None,
+    stop_event: Optional[threading.Event] = None
+) -> Tuple[int, Optional[cp_model.CpSolver]]:
+    """
+    Solve the full model for settings.initial_time, then until the time limit
+    of the (resolved) solver_settings repeatedly fix every session outside a
+    neighbourhood, re-solve the rest for settings.iteration_time from the
+    current solution, and keep the result if it is better. The gap limits
+    are checked against the initial solve's bound; the no-improvement
+    timeout ends the loop when no neighbourhood helped for that long.
+
+    on_improvement(values, progress) is called for every improving solution.
+    Returns (status, solver holding the best solution); status is OPTIMAL
+    only if the initial solve already proved optimality.
+    """
+    started = time.monotonic()
+    rng = random.Random(solver_settings.seed or 0)
+
+    def remaining() -> float:
+        return solver_settings.time_limit - (time.monotonic() - started)
+
+    def initial_solution(callback: cp_model.CpSolverSolutionCallback) -> None:
+        on_improvement(list(callback.response_proto.solution), {
+            "objective": callback.ObjectiveValue(),
+            "bound": callback.BestObjectiveBound(),
+            "wall_time": time.monotonic() - started,
+        })
+
+    # a short full solve gives a much better start than the first solution alone
+    solver = cp_model.CpSolver()
+    solver_settings.configure(solver)
+    solver.parameters.max_time_in_seconds = min(settings.initial_time, solver_settings.time_limit)
+    status = solve_with_stop(
+        solver, model, initial_solution if on_improvement else None, stop_event,
+        solver_settings.no_improvement_timeout
+    )
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return status, None
+
+    best_solver = solver
+    values = list(solver.response_proto.solution)
+    best = solver.ObjectiveValue()
+    bound = solver.BestObjectiveBound()
+    if status == cp_model.OPTIMAL:
+        return status, best_solver
+    last_improvement = time.monotonic()
+
+    iteration = 0
+    while remaining() > 0 and not (stop_event is not None and stop_event.is_set()):
+        if _within_gap(solver_settings, best, bound):
+            break
+        if (solver_settings.no_improvement_timeout is not None
+                and time.monotonic() - last_improvement > solver_settings.no_improvement_timeout):
+            break
+        kind = settings.neighbourhoods[iteration % len(settings.neighbourhoods)]
+        iteration += 1
+        placements = decoder.decode(values)
+        free = _free_sessions(kind, placements, session_team, top_of, settings.team_group_size, rng)
+        if not free:
+            continue
+
+        # fix everything outside the neighbourhood, start from the current solution
+        sub_model = model.Clone()
+        sub_model.ClearHints()
+        for (s, res_id, d), start_blk, _ in placements:
+            if s in free:
+                continue
+            key = (s, res_id, d)
+            sub_model.Add(sub_model.GetIntVarFromProtoIndex(registry.presence[key].Index()) == 1)
+            sub_model.Add(sub_model.GetIntVarFromProtoIndex(registry.start[key].Index()) == start_blk)
+        for idx, value in enumerate(values):
+            sub_model.AddHint(sub_model.GetIntVarFromProtoIndex(idx), value)
+
+        sub_solver = cp_model.CpSolver()
+        sub_solver.parameters.max_time_in_seconds = min(settings.iteration_time, remaining())
+        sub_solver.parameters.num_search_workers = solver_settings.num_workers
+        sub_solver.parameters.random_seed = rng.randrange(1 << 30)
+        sub_status = solve_with_stop(sub_solver, sub_model, stop_event=stop_event)
+        if sub_status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and sub_solver.ObjectiveValue() < best:
+            best_solver = sub_solver
+            values = list(sub_solver.response_proto.solution)
+            best = sub_solver.ObjectiveValue()
+            last_improvement = time.monotonic()
+            if on_improvement:
+                on_improvement(values, {
+                    "objective": best,
+                    "bound": bound,
+                    "wall_time": time.monotonic() - started,
+                })
+
+    return cp_model.FEASIBLE, best_solver
@@ -0,0 +1,64 @@
+"""
+Filename: streaming.py
+Fan-out of job progress events to Server-Sent Events subscribers, plus the
+solution delta encoding used on the stream.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+def solution_delta(previous: Optional[List[Dict]], current: List[Dict]) -> Dict[str, Any]:
+    """
+    Describe `current` relative to `previous` (both lists of session dicts).
+    Returns {"changed": [...sessions that are new or moved...], "removed": [...session ids...]}.
+    """
+    prev_by_id = {sess["session_id"]: sess for sess in (previous or [])}
+    changed = []
+    for sess in current:
+        if prev_by_id.pop(sess["session_id"], None) != sess:
+            changed.append(sess)
+    return {"changed": changed, "removed": list(prev_by_id)}
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class JobEventBroker:
+    """
+    Keeps one asyncio queue per stream subscriber. publish() is thread-safe
+    and can be called from executor threads; events are handed to each
+    subscriber's event loop with call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> asyncio.Queue:
+        """
+        Register a subscriber. Without loop, must be called from the
+        subscriber's event loop; the queue is only read from that loop.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[job_id].append((loop or asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(job_id, [])
+            self._subscribers[job_id] = [(loop, q) for loop, q in subs if q is not queue]
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(job_id, []))
+        for loop, queue in subs:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+            except RuntimeError:
+                # subscriber's loop is closed; it will be unsubscribed by its stream
+                pass
@@ -0,0 +1,142 @@
+"""
+Filename: symmetry.py
+Symmetry reduction for the CP-SAT model. Subfields of one top field with
+the same cost and the same ancestors and descendants (the quarters of a
+pitch, its halves) are interchangeable: the model gets one placement per
+class of them, limited to as many parallel sessions as the class has
+members, and the concrete subfield is chosen after solving. Sessions of a
+team with the same length, cost and pins are interchangeable as well and
+are ordered by day.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from ortools.sat.python import cp_model
+from problem import SchedulingProblem
+from registry import PlacementKey, VariableRegistry
+
+def equivalent_resources(problem: SchedulingProblem) -> Dict[int, List[int]]:
+    """
+    Classes of interchangeable resources as {representative: members}. The
+    representative is the first member in problem.resource_ids_by_top order;
+    every resource is in exactly one class.
+    """
+    descendants: Dict[int, Set[int]] = defaultdict(set)
+    for res_id, ancestors in problem.ancestor_map.items():
+        for anc_id in ancestors:
+            descendants[anc_id].add(res_id)
+
+    classes: Dict[int, List[int]] = {}
+    for top_id, res_ids in problem.resource_ids_by_top.items():
+        rep_of_signature: Dict[Tuple, int] = {}
+        for res_id in res_ids:
+            signature = (
+                problem.capacity_by_id[res_id],
+                frozenset(problem.ancestor_map.get(res_id, ())),
+                frozenset(descendants.get(res_id, ())),
+            )
+            rep = rep_of_signature.setdefault(signature, res_id)
+            classes.setdefault(rep, []).append(res_id)
+    return classes
+
+def equivalent_sessions(problem: SchedulingProblem) -> List[List[int]]:
+    """
+    Groups (two or more) of sessions of one team that only differ in their
+    index. Sessions pinned to a day are left out, two of them on the same
+    day cannot both be placed anyway.
+    """
+    groups: Dict[Tuple, List[int]] = defaultdict(list)
+    for s, (_, team_id, forced_top, cost, length, field_id, start_time, day) in enumerate(problem.sessions):
+        if day is None:
+            groups[(team_id, forced_top, cost, length, field_id, start_time)].append(s)
+    return [group for group in groups.values() if len(group) > 1]
+
+def order_matches(
+    groups: Sequence[List[int]],
+    matches: Dict[int, Tuple[PlacementKey, int]]
+) -> Dict[int, Tuple[PlacementKey, int]]:
+    """
+    Hand the placements of each fully matched group to its sessions in day
+    order, so the matches satisfy the ordering of add_session_order.
+    """
+    ordered = dict(matches)
+    for group in groups:
+        if not all(s in matches for s in group):
+            continue
+        placements = sorted((matches[s] for s in group), key=lambda m: m[0][2])
+        for s, ((_, res_id, d), start_blk) in zip(group, placements):
+            ordered[s] = ((s, res_id, d), start_blk)
+    return ordered
+
+def add_session_order(
+    model: cp_model.CpModel,
+    registry: VariableRegistry,
+    groups: Iterable[List[int]]
+) -> None:
+    """Each session of a group takes a later day than the one before (a team trains once per day)."""
+    for group in groups:
+        days = [
+            sum(key[2] * registry.presence[key] for key in registry.by_session[s])
+            for s in group
+        ]
+        for earlier, later in zip(days, days[1:]):
+            model.Add(earlier < later)
+
+def _overlaps(busy: List[Tuple[int, int]], start_blk: int, end_blk: int) -> bool:
+    return any(start_blk < b_end and b_start < end_blk for b_start, b_end in busy)
+
+def assign_resources(
+    placements: List[Tuple[PlacementKey, int, int]],
+    classes: Dict[int, List[int]],
+    preferred: Optional[Dict[int, int]] = None
+) -> List[Tuple[PlacementKey, int, int]]:
+    """
+    Replace the class representative of every placement by a concrete
+    member. Per class and day, sessions first get their preferred member
+    (e.g. their subfield in the previous schedule) where it is free, the
+    rest take the first member free for their whole session. Should that
+    leave a session without a member, the day is redone by start time,
+    giving each session the first member free again; as the model allows
+    at most as many overlapping sessions as the class has members, that
+    always succeeds.
+    """
+    preferred = preferred or {}
+    by_class_day: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for i, ((_, res_id, d), _, _) in enumerate(placements):
+        if len(classes.get(res_id, ())) > 1:
+            by_class_day[(res_id, d)].append(i)
+
+    result = list(placements)
+    for (rep, _), indices in by_class_day.items():
+        members = classes[rep]
+        indices = sorted(indices, key=lambda i: placements[i][1])
+        busy: Dict[int, List[Tuple[int, int]]] = {m: [] for m in members}
+        chosen: Dict[int, int] = {}
+        for i in indices:
+            (s, _, _), start_blk, end_blk = placements[i]
+            m = preferred.get(s)
+            if m in busy and not _overlaps(busy[m], start_blk, end_blk):
+                busy[m].append((start_blk, end_blk))
+                chosen[i] = m
+        for i in indices:
+            if i in chosen:
+                continue
+            _, start_blk, end_blk = placements[i]
+            m = next((m for m in members if not _overlaps(busy[m], start_blk, end_blk)), None)
+            if m is None:
+                break
+            busy[m].append((start_blk, end_blk))
+            chosen[i] = m
+        else:
+            for i, m in chosen.items():
+                (s, _, d), start_blk, end_blk = placements[i]
+                result[i] = ((s, m, d), start_blk, end_blk)
+            continue
+
+        free_at = {m: 0 for m in members}
+        for i in indices:
+            (s, _, d), start_blk, end_blk = placements[i]
+            m = next(m for m in members if free_at[m] <= start_blk)
+            free_at[m] = end_blk
+            result[i] = ((s, m, d), start_blk, end_blk)
+    return result
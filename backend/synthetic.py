@@ -0,0 +1,131 @@
+"""
+Filename: synthetic.py
+Seeded generator of synthetic clubs for benchmarks and experiments. A club
+has 11v11 fields (two halves and four quarters each) and 8v8 fields (two
+halves), weekday evening availability and on some fields Saturday
+mornings, and teams from U6 to U19 whose number, length and size of
+sessions follow their age. A share of the sessions is pinned to a day, a
+start time or a field. The same arguments always give the same club.
+"""
+
+import math
+import random
+import uuid
+from typing import Dict, List, Optional, Tuple
+from models.constraint import Constraint
+from models.field import DayOfWeek, Field, FieldAvailability, SubField
+from utils import SIZE_TO_CAPACITY, blocks_to_time_str, time_str_to_block
+
+WEEKDAYS = [DayOfWeek.MON, DayOfWeek.TUE, DayOfWeek.WED, DayOfWeek.THU, DayOfWeek.FRI]
+WEEKDAY_START = "16:00"
+WEEKDAY_ENDS = ["21:00", "21:30", "22:00"]
+SATURDAY_WINDOW = ("09:00", "13:00")
+
+# age band -> (sessions per week, session lengths in blocks, field costs)
+AGE_BANDS = {
+    range(6, 10): ((1, 2), (4,), (250,)),
+    range(10, 14): ((2, 3), (4, 6), (500,)),
+    range(14, 20): ((3,), (6, 8), (500, 1000, 1000)),
+}
+
+def _subfield(field_id: int, parent: Field, name: str, field_type: str) -> SubField:
+    return SubField(
+        field_id=field_id, facility_id=parent.facility_id, club_id=parent.club_id,
+        name=name, field_type=field_type, is_active=True, parent_field_id=parent.field_id
+    )
+
+def generate_fields(num_fields: int, rnd: random.Random, club_id: int = 1) -> List[Field]:
+    """Top fields with their subfields; about a third are 8v8 fields without quarters."""
+    fields = []
+    next_id = 1
+    for i in range(num_fields):
+        # the first field is always 11v11 so full-field sessions have a place
+        size = "8v8" if i > 0 and rnd.random() < 0.3 else "11v11"
+        weekday_end = rnd.choice(WEEKDAY_ENDS)
+        availability = {
+            day: FieldAvailability(day_of_week=day, start_time=WEEKDAY_START, end_time=weekday_end)
+            for day in WEEKDAYS
+        }
+        if rnd.random() < 0.5:
+            availability[DayOfWeek.SAT] = FieldAvailability(
+                day_of_week=DayOfWeek.SAT, start_time=SATURDAY_WINDOW[0], end_time=SATURDAY_WINDOW[1]
+            )
+        field = Field(
+            field_id=next_id, facility_id=i // 4 + 1, club_id=club_id, name=f"Field {i + 1}",
+            size=size, field_type="full", is_active=True, availability=availability
+        )
+        next_id += 1
+        for h in "AB":
+            field.half_subfields.append(_subfield(next_id, field, f"Field {i + 1}{h}", "half"))
+            next_id += 1
+        if size == "11v11":
+            for q in range(1, 5):
+                field.quarter_subfields.append(_subfield(next_id, field, f"Field {i + 1}.{q}", "quarter"))
+                next_id += 1
+        fields.append(field)
+    return fields
+
+def _fields_by_cost(fields: List[Field]) -> Dict[int, List[int]]:
+    """Field ids (top fields and subfields) by the cost a session on them has."""
+    by_cost: Dict[int, List[int]] = {}
+    for f in fields:
+        cap = SIZE_TO_CAPACITY[f.size]
+        by_cost.setdefault(cap, []).append(f.field_id)
+        for sf in f.half_subfields:
+            by_cost.setdefault(cap // 2, []).append(sf.field_id)
+        for sf in f.quarter_subfields:
+            by_cost.setdefault(cap // 4, []).append(sf.field_id)
+    return by_cost
+
+def generate_constraints(
+    num_teams: int,
+    fields: List[Field],
+    rnd: random.Random,
+    pin_rate: float = 0.1
+) -> List[Constraint]:
+    """
+    Sessions of num_teams teams. Each session is pinned with probability
+    pin_rate, to one of: a weekday (at most one pinned session per team and
+    day), a start time that fits every weekday window, or a field of the
+    session's size.
+    """
+    by_cost = _fields_by_cost(fields)
+    day_start = time_str_to_block(WEEKDAY_START)
+    day_end = min(time_str_to_block(end) for end in WEEKDAY_ENDS)
+    constraints = []
+    for team_id in range(1, num_teams + 1):
+        age = rnd.randint(6, 19)
+        sessions, lengths, costs = next(band for ages, band in AGE_BANDS.items() if age in ages)
+        pinned_days: List[int] = []
+        for _ in range(rnd.choice(sessions)):
+            length = rnd.choice(lengths)
+            cost = rnd.choice(costs)
+            day_of_week: Optional[int] = None
+            start_time: Optional[str] = None
+            field_id: Optional[int] = None
+            if rnd.random() < pin_rate:
+                pin = rnd.choice(("day", "start", "field"))
+                if pin == "day":
+                    day_of_week = rnd.choice([d for d in range(len(WEEKDAYS)) if d not in pinned_days])
+                    pinned_days.append(day_of_week)
+                elif pin == "start":
+                    start_time = blocks_to_time_str(rnd.randrange(day_start, day_end - length + 1, 2))
+                elif by_cost.get(cost):
+                    field_id = rnd.choice(by_cost[cost])
+            constraints.append(Constraint(
+                uid=uuid.UUID(int=rnd.getrandbits(128), version=4), team_id=team_id, year=f"U{age}",
+                start_time=start_time, length=length, day_of_week=day_of_week,
+                required_cost=cost, field_id=field_id
+            ))
+    return constraints
+
+def generate_club(
+    num_teams: int,
+    seed: int = 0,
+    teams_per_field: float = 8,
+    pin_rate: float = 0.1
+) -> Tuple[List[Field], List[Constraint]]:
+    """A club of num_teams teams on ceil(num_teams / teams_per_field) fields."""
+    rnd = random.Random(seed)
+    fields = generate_fields(max(1, math.ceil(num_teams / teams_per_field)), rnd)
+    return fields, generate_constraints(num_teams, fields, rnd, pin_rate)
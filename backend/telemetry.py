@@ -0,0 +1,183 @@
+"""
+Filename: telemetry.py
+Per-solve telemetry: model size, time spent in each phase of
+generate_schedule, presolve time, the objective and bound of every
+improving solution over time, CP-SAT's final response stats and, when
+enabled, a cProfile report. Collected by generate_schedule into a
+SolveTelemetry passed by the caller, summarized as one JSON log line per
+solve (solver processes set up the logger, see configure_logging); the
+executor ships it to the job store, where it is served by the status API
+and as a JSON download, and optionally written to SOLVER_TELEMETRY_DIR.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from ortools.sat.python import cp_model
+
+TELEMETRY_DIR = os.environ.get("SOLVER_TELEMETRY_DIR")
+# Profile every solve (SOLVER_PROFILE=1) instead of only requests asking for it
+PROFILE_ALL = os.environ.get("SOLVER_PROFILE", "0") not in ("", "0")
+PROFILE_TOP_N = 40  # functions kept in the profile report
+
+# The per-solve log line goes to SOLVER_LOG_FILE (default stderr) at SOLVER_LOG_LEVEL
+LOG_LEVEL = os.environ.get("SOLVER_LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.environ.get("SOLVER_LOG_FILE")
+
+logger = logging.getLogger(__name__)
+
+def configure_logging() -> None:
+    """Give the telemetry logger its handler and level (once per process; see LOG_LEVEL)."""
+    if logger.handlers:
+        return
+    handler = logging.FileHandler(LOG_FILE) if LOG_FILE else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    # not also through the root logger, should the host application configure one
+    logger.propagate = False
+
+_PRESOLVE_START = re.compile(r"^Starting presolve at ([\d.]+)s")
+_SEARCH_START = re.compile(r"^Starting search at ([\d.]+)s")
+
+class SolveTelemetry:
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.model: Dict[str, int] = {}
+        self.build_time: Optional[float] = None  # seconds from start until the model was built
+        self.presolve_time: Optional[float] = None
+        self.solutions: List[Dict[str, float]] = []
+        self.status: Optional[str] = None
+        self.wall_time: Optional[float] = None
+        self.solver_stats: Optional[str] = None
+        self.components: List["SolveTelemetry"] = []
+        self.phases: Dict[str, float] = {}  # seconds per phase, in order
+        self.objectives: Dict[str, float] = {}  # value of each objective term in the final solution
+        self.profile: Optional[str] = None
+        self._phase: Optional[str] = None
+        self._phase_started = 0.0
+        self._presolve_started: Optional[float] = None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def begin_phase(self, name: Optional[str]) -> None:
+        """End the running phase and start timing `name` (None just ends it)."""
+        now = time.monotonic()
+        if self._phase is not None:
+            self.phases[self._phase] = self.phases.get(self._phase, 0.0) + now - self._phase_started
+        self._phase = name
+        self._phase_started = now
+
+    @contextmanager
+    def profiling(self, enabled: bool):
+        """
+        cProfile the block if enabled; the report ends up in `profile`.
+        cProfile only sees the calling thread, and only one profiler can be
+        active per process. A request decomposed into components solves them
+        in worker threads, so its profile covers the decomposition and the
+        waiting for those threads, not the component solves themselves.
+        """
+        profiler = cProfile.Profile() if enabled or PROFILE_ALL else None
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # another profiler is active in this process
+                profiler = None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                report = io.StringIO()
+                pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+                self.profile = report.getvalue()
+
+    def component(self) -> "SolveTelemetry":
+        """Telemetry of one independently solved component."""
+        child = SolveTelemetry()
+        self.components.append(child)
+        return child
+
+    def record_model(self, model: cp_model.CpModel, num_sessions: int, num_placements: int) -> None:
+        proto = model.Proto()
+        self.model = {
+            "sessions": num_sessions,
+            "placements": num_placements,
+            "variables": len(proto.variables),
+            "constraints": len(proto.constraints),
+        }
+        self.build_time = self.elapsed()
+
+    def attach(self, solver: cp_model.CpSolver) -> None:
+        """Read presolve timing from the solver's log (logged to the callback only, not stdout)."""
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = self._on_log_line
+
+    def _on_log_line(self, line: str) -> None:
+        match = _PRESOLVE_START.match(line)
+        if match:
+            self._presolve_started = float(match.group(1))
+            return
+        match = _SEARCH_START.match(line)
+        if match and self._presolve_started is not None:
+            self.presolve_time = float(match.group(1)) - self._presolve_started
+
+    def record_solution(self, progress: Dict[str, float]) -> None:
+        """An improving solution; `time` counts from the start of generate_schedule."""
+        self.solutions.append({"time": self.elapsed(), **progress})
+
+    def record_result(self, status: str, solver_stats: Optional[str] = None) -> None:
+        self.status = status
+        self.wall_time = self.elapsed()
+        self.solver_stats = solver_stats
+
+    def log_summary(self) -> None:
+        """One structured (JSON) log line with the outcome and where the time went."""
+        self.begin_phase(None)
+        logger.info(json.dumps({
+            "event": "schedule_solve",
+            "status": self.status,
+            "wall_time": self.wall_time,
+            "phases": self.phases,
+            "model": self.model,
+            "objectives": self.objectives,
+            "solutions": len(self.solutions),
+            "components": len(self.components),
+        }))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "model": self.model,
+            "phases": self.phases,
+            "build_time": self.build_time,
+            "presolve_time": self.presolve_time,
+            "solutions": self.solutions,
+            "status": self.status,
+            "wall_time": self.wall_time,
+            "solver_stats": self.solver_stats,
+            "objectives": self.objectives,
+        }
+        if self.profile is not None:
+            data["profile"] = self.profile
+        if self.components:
+            data["components"] = [c.to_dict() for c in self.components]
+        return data
+
+def dump_telemetry(job_id: str, telemetry: Dict[str, Any]) -> None:
+    """Write a job's telemetry to SOLVER_TELEMETRY_DIR/<job_id>.json, if configured."""
+    if not TELEMETRY_DIR:
+        return
+    os.makedirs(TELEMETRY_DIR, exist_ok=True)
+    with open(os.path.join(TELEMETRY_DIR, f"{job_id}.json"), "w") as f:
+        json.dump(telemetry, f, indent=2)
@@ -0,0 +1,225 @@
+"""
+Filename: validation.py
+Checks a schedule (solver session dicts) against the scheduling rules and
+returns the violations found. Overlaps are found with a sweep over the
+start and end events of each top field and day, so the cost grows with the
+number of sessions and actual overlaps instead of with all session pairs.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from models.constraint import Constraint
+from models.field import Field
+from models.schedule import ScheduleEntry, ScheduledSession, ScheduleViolation
+from field_tree import DAY_TO_IDX, IDX_TO_DAY
+from problem import SchedulingProblem
+from utils import blocks_to_time_str, time_str_to_block
+
+def normalize_schedule(schedule: Sequence[Union[ScheduledSession, ScheduleEntry]]) -> List[Dict]:
+    """
+    Bring ScheduleEntry items and solver sessions to the solver's session
+    dict format. A session keeps its session_id, otherwise its position in
+    `schedule` is used. Entries without team or field are skipped; a session
+    without end_time raises ValueError.
+    """
+    sessions = []
+    for pos, item in enumerate(schedule):
+        if isinstance(item, ScheduleEntry):
+            if item.team_id is None or item.field_id is None:
+                continue
+            start_blk = item.dtstart.hour * 4 + item.dtstart.minute // 15
+            end_blk = item.dtend.hour * 4 + item.dtend.minute // 15
+            sessions.append({
+                "session_id": pos,
+                "team_id": item.team_id,
+                "field_id": item.field_id,
+                "day_of_week": IDX_TO_DAY[item.dtstart.weekday()],
+                "start_time": blocks_to_time_str(start_blk),
+                "end_time": blocks_to_time_str(end_blk),
+            })
+        else:
+            if item.end_time is None:
+                raise ValueError(f"Session {item.session_id if item.session_id is not None else pos} has no end_time")
+            sessions.append({
+                "session_id": item.session_id if item.session_id is not None else pos,
+                "team_id": item.team_id,
+                "field_id": item.field_id,
+                "day_of_week": item.day_of_week,
+                "start_time": item.start_time,
+                "end_time": item.end_time,
+            })
+    return sessions
+
+def find_conflicts(
+    schedule: List[Dict],
+    fields: List[Field],
+    constraints: Optional[List[Constraint]] = None
+) -> List[ScheduleViolation]:
+    """
+    Validate a schedule against the (top-level) fields:
+        unknown_field     - field id not in the request
+        availability      - outside the top field's window for that day
+        double_booking    - two sessions overlap on the same (sub)field
+        subfield_overlap  - a field and one of its subfields overlap
+        capacity          - overlapping sessions exceed the top field's capacity
+        team_per_day      - a team has more than one session on a day
+        unmet_constraint  - with constraints given, a constraint no session of
+                            the team satisfies
+    """
+    problem = SchedulingProblem(fields, constraints or [])
+    fields_by_id = problem.fields_by_id
+    violations: List[ScheduleViolation] = []
+
+    # (top, day) -> [(start, end, field_id, session_id)]
+    by_top_day: Dict[Tuple[int, int], List[Tuple[int, int, int, int]]] = defaultdict(list)
+    by_team_day: Dict[Tuple[int, str], List[int]] = defaultdict(list)
+    for sess in schedule:
+        sid, field_id, day = sess['session_id'], sess['field_id'], sess['day_of_week']
+        by_team_day[(sess['team_id'], day)].append(sid)
+        if field_id not in fields_by_id:
+            violations.append(ScheduleViolation(
+                kind='unknown_field', message=f"Session {sid} uses unknown field {field_id}.",
+                day_of_week=day, field_id=field_id, session_ids=[sid]
+            ))
+            continue
+        start_blk, end_blk = time_str_to_block(sess['start_time']), time_str_to_block(sess['end_time'])
+        top_id, d = problem.top_of[field_id], DAY_TO_IDX[day]
+        window = problem.field_info[top_id]['day_windows'].get(d)
+        if window is None or start_blk < window[0] or end_blk > window[1]:
+            violations.append(ScheduleViolation(
+                kind='availability',
+                message=f"Session {sid} on '{fields_by_id[field_id].name}' (ID {field_id}) "
+                        f"is outside the field's availability on {day}.",
+                day_of_week=day, field_id=field_id, session_ids=[sid]
+            ))
+        by_top_day[(top_id, d)].append((start_blk, end_blk, field_id, sid))
+
+    for (team_id, day), sids in by_team_day.items():
+        if len(sids) > 1:
+            violations.append(ScheduleViolation(
+                kind='team_per_day', message=f"Team {team_id} has {len(sids)} sessions on {day}.",
+                day_of_week=day, team_id=team_id, session_ids=sids
+            ))
+
+    for (top_id, d), sessions in by_top_day.items():
+        violations.extend(_sweep(problem, top_id, IDX_TO_DAY[d], sessions))
+    if constraints:
+        violations.extend(_unmet_constraints(problem, schedule))
+    return violations
+
+def _satisfies(problem: SchedulingProblem, s: int, sess: Dict) -> bool:
+    """Whether a placed session fulfils session s of the problem (the same rules generate_schedule uses)."""
+    _, _, forced_top_field, cost, length, _, c_start_time, c_day_of_week = problem.sessions[s]
+    field_id = sess['field_id']
+    if field_id not in problem.capacity_by_id or problem.capacity_by_id[field_id] != cost:
+        return False
+    if forced_top_field is not None and problem.top_of[field_id] != forced_top_field:
+        return False
+    start_blk = time_str_to_block(sess['start_time'])
+    if time_str_to_block(sess['end_time']) - start_blk != length:
+        return False
+    if c_day_of_week is not None and DAY_TO_IDX[sess['day_of_week']] != c_day_of_week:
+        return False
+    return c_start_time is None or time_str_to_block(c_start_time) == start_blk
+
+def _unmet_constraints(problem: SchedulingProblem, schedule: List[Dict]) -> List[ScheduleViolation]:
+    """Match every constraint to its own session of the team (augmenting paths) and report the unmatched ones."""
+    placed_by_team: Dict[int, List[Dict]] = defaultdict(list)
+    for sess in schedule:
+        placed_by_team[sess['team_id']].append(sess)
+    wanted_by_team: Dict[int, List[int]] = defaultdict(list)
+    for s, session_data in enumerate(problem.sessions):
+        wanted_by_team[session_data[1]].append(s)
+
+    violations = []
+    for team_id, wanted in wanted_by_team.items():
+        placed = placed_by_team.get(team_id, [])
+        options = {s: [i for i, sess in enumerate(placed) if _satisfies(problem, s, sess)] for s in wanted}
+        owner: Dict[int, int] = {}  # placed index -> constraint session
+
+        def assign(s: int, seen: set) -> bool:
+            for i in options[s]:
+                if i in seen:
+                    continue
+                seen.add(i)
+                if i not in owner or assign(owner[i], seen):
+                    owner[i] = s
+                    return True
+            return False
+
+        for s in wanted:
+            if not assign(s, set()):
+                _, _, _, cost, length, field_id, c_start_time, c_day_of_week = problem.sessions[s]
+                details = [f"{length * 15} min", f"cost {cost}"]
+                if field_id is not None:
+                    details.append(f"field {field_id}")
+                if c_day_of_week is not None:
+                    details.append(IDX_TO_DAY[c_day_of_week])
+                if c_start_time is not None:
+                    details.append(f"at {c_start_time}")
+                violations.append(ScheduleViolation(
+                    kind='unmet_constraint',
+                    message=f"Team {team_id} has no session for constraint {s} ({', '.join(details)}).",
+                    day_of_week=IDX_TO_DAY[c_day_of_week] if c_day_of_week is not None else None,
+                    field_id=field_id, team_id=team_id
+                ))
+    return violations
+
+def _sweep(
+    problem: SchedulingProblem,
+    top_id: int,
+    day: str,
+    sessions: List[Tuple[int, int, int, int]]
+) -> List[ScheduleViolation]:
+    """Overlap and capacity violations among the sessions of one top field and day."""
+    fields_by_id = problem.fields_by_id
+    cap = problem.field_info[top_id]['total_cap']
+    # ends sort before starts at the same block, touching sessions do not overlap;
+    # empty sessions occupy nothing
+    timed = [i for i, (start, end, _, _) in enumerate(sessions) if start < end]
+    events = sorted(
+        [(sessions[i][1], 0, i) for i in timed]
+        + [(sessions[i][0], 1, i) for i in timed]
+    )
+    violations: List[ScheduleViolation] = []
+    active: List[int] = []
+    used = 0
+    over_capacity = False
+    for _, is_start, i in events:
+        _, _, field_id, sid = sessions[i]
+        cost = problem.capacity_by_id[field_id]
+        if not is_start:
+            active.remove(i)
+            used -= cost
+            over_capacity = used > cap
+            continue
+        for j in active:
+            _, _, other_id, other_sid = sessions[j]
+            if other_id == field_id:
+                violations.append(ScheduleViolation(
+                    kind='double_booking',
+                    message=f"Field '{fields_by_id[field_id].name}' (ID {field_id}) is double booked "
+                            f"in sessions {other_sid} and {sid}.",
+                    day_of_week=day, field_id=field_id, session_ids=[other_sid, sid]
+                ))
+            elif problem.tree.related(other_id, field_id):
+                violations.append(ScheduleViolation(
+                    kind='subfield_overlap',
+                    message=f"Fields '{fields_by_id[other_id].name}' (ID {other_id}) and "
+                            f"'{fields_by_id[field_id].name}' (ID {field_id}) contain each other "
+                            f"and are used at the same time (sessions {other_sid}, {sid}).",
+                    day_of_week=day, field_id=field_id, session_ids=[other_sid, sid]
+                ))
+        active.append(i)
+        used += cost
+        # one violation per stretch over capacity
+        if used > cap and not over_capacity:
+            violations.append(ScheduleViolation(
+                kind='capacity',
+                message=f"Field '{fields_by_id[top_id].name}' (ID {top_id}) is over capacity "
+                        f"({used}/{cap}) on {day}.",
+                day_of_week=day, field_id=top_id,
+                session_ids=[sessions[k][3] for k in active]
+            ))
+        over_capacity = used > cap
+    return violations